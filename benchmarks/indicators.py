@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Per-indicator cost of the indicator engine against the pandas code the pages
+# used before, on a synthetic random walk, the cost of a stream update when one
+# bar is added and of a multi-ticker comparison computed as one panel.
+#
+#   python benchmarks/indicators.py --bars 100000
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = ["SMA_20", "SMA_200", "EMA_20", "EMA_200", "ATR", "MACD", "RSI"]
+
+
+def pandas_indicators(df, INDICATORS):
+    # The block formerly pasted in every market page
+    for INDICATOR in INDICATORS:
+        if "SMA" in INDICATOR:
+            window = int(INDICATOR.split("_")[1])
+            df[INDICATOR] = df['Close'].rolling(window=window, min_periods=1).mean()
+        if "EMA" in INDICATOR:
+            window = int(INDICATOR.split("_")[1])
+            df[INDICATOR] = df['Close'].ewm(span=window, adjust=False, min_periods=1).mean()
+
+    if "ATR" in INDICATORS:
+        Prev_Close = df['Close'].shift(1)
+        High_Low = df['High'] - df['Low']
+        High_PrevClose = abs(df['High'] - Prev_Close)
+        Low_PrevClose = abs(df['Low'] - Prev_Close)
+        df['TR'] = pd.concat([High_Low, High_PrevClose, Low_PrevClose], axis=1).max(axis=1)
+        df['ATR'] = df['TR'].rolling(window=14, min_periods=1).mean()
+        df = df.drop(columns=['TR'], axis=1)
+
+    if "MACD" in INDICATORS:
+        ema_short = df['Close'].ewm(span=12, adjust=False, min_periods=1).mean()
+        ema_long = df['Close'].ewm(span=26, adjust=False, min_periods=1).mean()
+        df['MACD'] = ema_short - ema_long
+        df['Signal'] = df['MACD'].ewm(span=9, adjust=False, min_periods=1).mean()
+        df['MACD_Hist'] = df['MACD'] - df['Signal']
+
+    if "RSI" in INDICATORS:
+        delta = df['Close'].pct_change(periods=1) * 100
+        gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
+        rs = gain / loss
+        df['RSI'] = 100 - (100 / (1 + rs))
+
+    return df
+
+
+def random_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.005, n)) * close
+    index = pd.date_range("2000-01-03 09:30", periods=n, freq="min", tz="America/New_York", name="Datetime")
+    return pd.DataFrame({
+        "Open": close + rng.normal(0, 0.002, n) * close,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000, 100_000, n),
+    }, index=index).astype({"Open": "float32", "High": "float32", "Low": "float32", "Close": "float32"})
+
+
+def best_of(runs, func):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--panel-bars", type=int, default=250)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from indicators import compute_indicators, compute_panel, IndicatorStream
+
+    df = random_bars(args.bars)
+
+    print(f"{args.bars} bars, best of {args.runs}")
+    print(f"{'indicator':<12}{'pandas (ms)':>12}{'engine (ms)':>12}{'speedup':>9}  max abs diff")
+    for case in CASES + ["all"]:
+        indicators = CASES if case == "all" else [case]
+        slow = best_of(args.runs, lambda: pandas_indicators(df.copy(deep=False), indicators))
+        fast = best_of(args.runs, lambda: compute_indicators(df, indicators))
+
+        expected = pandas_indicators(df.copy(deep=False), indicators)
+        result = compute_indicators(df, indicators)
+        diff = max(np.nanmax(np.abs(expected[col].to_numpy() - values)) for col, values in result.items())
+        print(f"{case:<12}{slow * 1000:>12.2f}{fast * 1000:>12.2f}{slow / fast:>8.1f}x  {diff:.2e}")
+
+    # Refreshes alternate between two closes of the forming last bar, so every
+    # update rewinds and recomputes one bar
+    forming = df.copy()
+    forming.iloc[-1, forming.columns.get_loc('Close')] *= 1.001
+    frames = itertools.cycle([df, forming])
+    stream = IndicatorStream(CASES)
+    stream.update(df)
+    update = best_of(args.runs, lambda: stream.update(next(frames)))
+    print(f"{'stream':<12}{'':>12}{update * 1000:>12.2f}{fast / update:>8.1f}x  per one-bar update")
+
+    frames = [random_bars(args.panel_bars, seed) for seed in range(args.tickers)]
+    looped = best_of(args.runs, lambda: [compute_indicators(frame, CASES) for frame in frames])
+    panel = best_of(args.runs, lambda: compute_panel(frames, CASES))
+    print(f"{'panel':<12}{looped * 1000:>12.2f}{panel * 1000:>12.2f}{looped / panel:>8.1f}x  "
+          f"{args.tickers} tickers of {args.panel_bars} bars, one by one vs panel")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Offline page render benchmark: replays recorded Yahoo responses with a fixed
+# latency per call and times cold and warm runs of each page.
+#
+#   python benchmarks/render.py --record fixtures        # capture once, online
+#   python benchmarks/render.py fixtures --latency 0.1   # replay, offline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = [
+    "views/Page_price.py",
+    "views/Page_financials.py",
+    "views/Page_forex.py",
+    "views/Page_commodity.py",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures", nargs="?")
+    parser.add_argument("--record", metavar="DIR", help="capture fixtures from Yahoo instead")
+    parser.add_argument("--latency", default="0", help='seconds per call, or "history=0.2,info=0.05"')
+    parser.add_argument("--runs", type=int, default=3, help="warm runs per page")
+    parser.add_argument("--tickers", default="MSFT", help="value of the Securities input")
+    parser.add_argument("--page", action="append", help="page to run (default: all)")
+    args = parser.parse_args()
+
+    # Keep the benchmark's history store and shared cache away from the app's
+    os.environ.setdefault("HISTORY_STORE_DIR", tempfile.mkdtemp(prefix="history-"))
+    os.environ.setdefault("CACHE_DB", os.path.join(tempfile.mkdtemp(prefix="cache-"), "cache.sqlite"))
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    import streamlit as st
+    from streamlit import logger
+    from streamlit.testing.v1 import AppTest
+    from providers import ReplayProvider, RecordingProvider, parse_latency, set_provider
+    from ratelimit import limiter
+    from http_pool import session_stats
+    from cache import invalidate, cache_stats
+
+    if args.record:
+        provider = RecordingProvider(args.record)
+    elif args.fixtures:
+        provider = ReplayProvider(args.fixtures, latency=parse_latency(args.latency))
+    else:
+        parser.error("fixtures directory or --record is required")
+    set_provider(provider)
+    logger.set_log_level("error")
+
+    print(f"{'page':<28}{'cold (s)':>10}{'warm (s)':>10}  upstream calls (cold / warm)")
+    for page in args.page or PAGES:
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        invalidate()
+
+        at = AppTest.from_file(page, default_timeout=120)
+        at.session_state["tickers"] = args.tickers
+
+        calls = dict(getattr(provider, "calls", {}))
+        start = time.perf_counter()
+        at.run()
+        cold = time.perf_counter() - start
+        cold_calls = _diff(provider, calls)
+
+        warm = []
+        calls = dict(getattr(provider, "calls", {}))
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            at.run()
+            warm.append(time.perf_counter() - start)
+        warm_calls = _diff(provider, calls)
+
+        if at.exception:
+            print(f"{page}: {at.exception[0].message}")
+        print(f"{page:<28}{cold:>10.3f}{min(warm, default=0):>10.3f}  {cold_calls} / {warm_calls}")
+
+    print(f"Cache: {cache_stats()}")
+    if args.record:
+        print(f"Rate limiter: {limiter.stats()}")
+        print(f"HTTP pool: {session_stats()}")
+
+
+def _diff(provider, before):
+    after = getattr(provider, "calls", {})
+    return {key: after[key] - before.get(key, 0) for key in after if after[key] != before.get(key, 0)}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import time
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from providers import get_provider
+from shared_cache import shared_store
+
+# Seconds a board snapshot is served before it is refreshed in the background
+MAX_AGE = 60
+
+# Seconds a page waits for a board that has never been fetched
+COLD_TIMEOUT = 5
+
+
+def read_table(url):
+    # A board another app process fetched recently is reused
+    shared = shared_store()
+    if shared is None:
+        return get_provider().table(url)
+    key = repr(("read_table", url))
+    with shared.lock(key):
+        data = shared.get(key, max_age=MAX_AGE)
+        if data is not None:
+            return pickle.loads(data)
+        df = get_provider().table(url)
+        shared.put(key, "table", url, pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+        return df
+
+
+class QuoteBoards:
+    # Market overview tables scraped from Yahoo, shared by every session.
+    # The last good snapshot of a board is always served straight away; a stale
+    # one is refreshed on a worker thread and only a board that was never
+    # fetched makes the caller wait.
+
+    def __init__(self, max_age=MAX_AGE, workers=6, reader=read_table):
+        self.max_age = max_age
+        self.reader = reader
+        self._snapshots = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quote-boards")
+
+    def _refresh(self, url):
+        try:
+            df = self.reader(url)
+            with self._lock:
+                self._snapshots[url] = (df, time.time())
+        except Exception as e:
+            # Keep serving the previous snapshot
+            print(f"Error refreshing {url}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(url, None)
+
+    def _submit(self, url):
+        with self._lock:
+            future = self._pending.get(url)
+            if future is None:
+                future = self._pool.submit(self._refresh, url)
+                self._pending[url] = future
+            return future
+
+    def get(self, urls, timeout=COLD_TIMEOUT):
+        # Returns {url: DataFrame or None}; None only for a cold board still loading
+        now = time.time()
+        cold = []
+        for url in urls:
+            snapshot = self._snapshots.get(url)
+            if snapshot is None:
+                cold.append(self._submit(url))
+            elif now - snapshot[1] > self.max_age:
+                self._submit(url)
+
+        if cold:
+            wait(cold, timeout=timeout)
+
+        result = {}
+        for url in urls:
+            snapshot = self._snapshots.get(url)
+            result[url] = None if snapshot is None else snapshot[0]
+        return result
+
+    def age(self, url):
+        snapshot = self._snapshots.get(url)
+        return None if snapshot is None else time.time() - snapshot[1]
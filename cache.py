@@ -0,0 +1,309 @@
+import os
+import time
+import pickle
+import threading
+import functools
+from collections import OrderedDict
+from contextlib import nullcontext
+
+import pandas as pd
+import pyarrow as pa
+
+from schema import dense_bars
+from shared_cache import shared_store, SYNC_INTERVAL
+
+# Process-wide cache for the Yahoo loaders, shared by every session like
+# st.cache_data, but with entries tagged by ticker and data kind so a refresh
+# can drop just what it needs instead of clearing everything.
+KINDS = ["info", "history", "statements", "indicators"]
+
+# Memory budget shared by all cached loaders; least recently used entries are
+# evicted once it is exceeded
+MAX_BYTES = int(os.environ.get("CACHE_MAX_MB", 256)) * 2 ** 20
+MAX_ENTRIES = 2000
+
+# The Cache page lists and invalidates the entries of every session, so it is
+# only served when CACHE_ADMIN is set
+CACHE_ADMIN = os.environ.get("CACHE_ADMIN", "") not in ("", "0")
+
+
+class FrozenFrame:
+    # A cached DataFrame whose columns live in Arrow buffers. Every hit gets a
+    # shallow copy of one read-only view on them, so nothing is deserialised
+    # or copied per rerun; writing into a column raises instead of corrupting
+    # the cache, adding or replacing columns only affects the caller's frame.
+
+    def __init__(self, df):
+        self.table = pa.Table.from_arrays(
+            [pa.array(df.iloc[:, i].to_numpy(), from_pandas=False) for i in range(df.shape[1])],
+            names=[str(i) for i in range(df.shape[1])],
+        )
+        self.view = pd.DataFrame(
+            {i: column.chunk(0).to_numpy(zero_copy_only=True) for i, column in enumerate(self.table.columns)},
+            index=df.index,
+            copy=False,
+        )
+        self.view.columns = df.columns
+        self.nbytes = self.table.nbytes + int(df.index.memory_usage(deep=True))
+
+    def get(self):
+        return self.view.copy(deep=False)
+
+    # Pickled as an Arrow IPC stream, which is read back without copying
+
+    def __getstate__(self):
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, self.table.schema) as writer:
+            writer.write_table(self.table)
+        return sink.getvalue().to_pybytes(), self.view.index, self.view.columns
+
+    def __setstate__(self, state):
+        data, index, columns = state
+        self.table = pa.ipc.open_stream(pa.py_buffer(data)).read_all().combine_chunks()
+        self.view = pd.DataFrame(
+            {i: column.chunk(0).to_numpy(zero_copy_only=True) for i, column in enumerate(self.table.columns)},
+            index=index,
+            copy=False,
+        )
+        self.view.columns = columns
+        self.nbytes = self.table.nbytes + int(index.memory_usage(deep=True))
+
+
+def _freezable(df):
+    return isinstance(df, pd.DataFrame) and all(dtype.kind in "iuf" for dtype in df.dtypes)
+
+
+def freeze(value):
+    # Frames with numeric columns go to Arrow, containers of frames are frozen
+    # item by item, anything else is pickled
+    if isinstance(value, pd.DataFrame):
+        dense = dense_bars(value)
+        if _freezable(dense) and dense.shape[1] and len(dense):
+            return FrozenFrame(dense)
+    if isinstance(value, dict) and any(isinstance(v, (pd.DataFrame, dict)) for v in value.values()):
+        return {k: freeze(v) for k, v in value.items()}
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def thaw(data):
+    if isinstance(data, FrozenFrame):
+        return data.get()
+    if isinstance(data, dict):
+        return {k: thaw(v) for k, v in data.items()}
+    return pickle.loads(data)
+
+
+def sizeof(data):
+    # Memory footprint of a frozen value, in bytes
+    if isinstance(data, FrozenFrame):
+        return data.nbytes
+    if isinstance(data, dict):
+        return sum(sizeof(v) for v in data.values())
+    return len(data)
+
+
+class DataCache:
+
+    def __init__(self, max_bytes=MAX_BYTES, max_entries=MAX_ENTRIES, shared=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # Optional SharedStore other app processes read and fill too
+        self.shared = shared
+        self.synced = shared.last_invalidation() if shared else 0
+        self.checked = time.monotonic()
+        self.shared_hits = 0
+        # (function, key) -> (frozen value, kind, ticker, created, size)
+        self._entries = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+        # Set while a thread computes an entry under its locks
+        self._local = threading.local()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._locks.pop(key, None)
+            size = entry[4]
+            if size > self.max_bytes:
+                # Larger than the whole budget, serve it uncached
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[4]
+            self._entries[key] = entry
+            self.bytes += size
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted[4]
+                self.evictions += 1
+
+    def _sync(self):
+        # Applies the invalidations made by other processes
+        if self.shared is None or time.monotonic() - self.checked < SYNC_INTERVAL:
+            return
+        self.checked = time.monotonic()
+        for id_, tickers, kind in self.shared.invalidations(self.synced):
+            self._invalidate(tickers, kind)
+            self.synced = id_
+
+    def _load_shared(self, key):
+        data = self.shared.get(repr(key))
+        if data is None:
+            return None
+        with self._lock:
+            self.shared_hits += 1
+        return pickle.loads(data)
+
+    def _compute(self, key, kind, ticker, locked, func, *args, **kwargs):
+        if self.shared is not None:
+            data = self._load_shared(key)
+            if data is not None:
+                return data
+        # Concurrent misses on one key compute it once, across processes too
+        with self.shared.lock(repr(key)) if self.shared is not None and locked else nullcontext():
+            if self.shared is not None and locked:
+                data = self._load_shared(key)
+                if data is not None:
+                    return data
+            with self._lock:
+                self.misses += 1
+            data = freeze(func(*args, **kwargs))
+            if self.shared is not None:
+                self.shared.put(repr(key), kind, ticker, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+            return data
+
+    def get_or_compute(self, key, kind, ticker, func, *args, **kwargs):
+        self._sync()
+        entry = self._get(key)
+        if entry is None:
+            # A thread only waits for a lock while it holds none. Loaders that
+            # call other cached loaders compute those entries without the key
+            # lock or the stripe: the thread holding them may be waiting for
+            # our stripe, and would never let go.
+            nested = getattr(self._local, "computing", False)
+            with nullcontext() if nested else self._key_lock(key):
+                entry = self._get(key)
+                if entry is None:
+                    self._local.computing = True
+                    try:
+                        data = self._compute(key, kind, ticker, not nested, func, *args, **kwargs)
+                    finally:
+                        self._local.computing = nested
+                    entry = (data, kind, ticker, time.time(), sizeof(data))
+                    self._put(key, entry)
+                    return thaw(data)
+        with self._lock:
+            self.hits += 1
+        return thaw(entry[0])
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[4]
+
+    def invalidate(self, tickers=None, kind=None):
+        if self.shared is not None:
+            self.shared.invalidate(tickers, kind)
+        return self._invalidate(tickers, kind)
+
+    def _invalidate(self, tickers=None, kind=None):
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if kind in (None, entry[1]) and (tickers is None or entry[2] in tickers)
+            ]
+            for key in keys:
+                self.bytes -= self._entries.pop(key)[4]
+            return len(keys)
+
+    def entries(self):
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "kind": kind,
+                    "function": key[0],
+                    "ticker": ticker,
+                    "key": repr(key[1]),
+                    "age (s)": round(now - created, 1),
+                    "size (KB)": round(size / 1024, 1),
+                }
+                for key, (data, kind, ticker, created, size) in self._entries.items()
+            ]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
+        if self.shared is not None:
+            stats.update(self.shared.stats())
+        return stats
+
+
+_cache = None
+_cache_guard = threading.Lock()
+
+
+def get_cache():
+    # The process's DataCache, built on first use so that importing the
+    # loaders opens no database
+    global _cache
+    with _cache_guard:
+        if _cache is None:
+            _cache = DataCache(shared=shared_store())
+        return _cache
+
+
+def cached(kind):
+    # Decorator for loaders whose first argument is the ticker
+    def decorator(func):
+        def make_key(ticker, *args, **kwargs):
+            return (func.__name__, (ticker, args, tuple(sorted(kwargs.items()))))
+
+        @functools.wraps(func)
+        def wrapper(ticker, *args, **kwargs):
+            key = make_key(ticker, *args, **kwargs)
+            return get_cache().get_or_compute(key, kind, ticker, func, ticker, *args, **kwargs)
+
+        # Drops the entry of one set of arguments
+        wrapper.discard = lambda *args, **kwargs: get_cache().discard(make_key(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def invalidate(tickers=None, kind=None):
+    # Drops the entries of the given tickers (all when None), optionally only
+    # those of one kind, and returns how many were removed
+    return get_cache().invalidate(None if tickers is None else set(tickers), kind)
+
+
+def cache_entries():
+    return get_cache().entries()
+
+
+def cache_stats():
+    return get_cache().stats()
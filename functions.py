@@ -1,67 +1,248 @@
 import streamlit as st
-import yfinance as yf
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.colors as pc
 
-@st.cache_data
+from store import load_history, load_history_batch, expire_store, INTRADAY_LIMITS
+from market_hours import next_expiry, period_covers, period_since, period_start, slice_period, INFO_TTL
+from symbols import is_known_symbol, search_symbols
+from boards import QuoteBoards
+from providers import get_provider
+from indicators import add_indicators, stream_indicators, compute_panel, indicator_lookback, indicator_style, indicator_scale_free, lookback, INDICATOR_OPTIONS
+from schema import dense_bars
+from cache import cached, invalidate, cache_entries, cache_stats, KINDS, CACHE_ADMIN
+
+# The cached loaders take the next expiry instant as part of their key, so an
+# entry is simply never hit again once the market has moved past it.
 def fetch_info(ticker):
-    ticker = yf.Ticker(ticker)
-    info = ticker.info
-    if "quoteType" in ticker.info:
+    return _fetch_info(ticker, next_expiry(ticker, INFO_TTL).timestamp())
+
+@cached("info")
+def _fetch_info(ticker, expires):
+    info = get_provider().info(ticker)
+    if "quoteType" in info:
         return info
     else:
         return None
         #st.warning("Invalid ticker")
         #st.stop()
 
-@st.cache_data
+MAX_WORKERS = 8
+
+def run_parallel(func, items):
+    # Worker threads need the session's script context to use st.cache_data
+    ctx = get_script_run_ctx()
+
+    def call(item):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(item)
+
+    if len(items) < 2:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(items))) as pool:
+        return list(pool.map(call, items))
+
+def validate_tickers(tickers):
+    # The local index settles the markets it covers without a request; the
+    # other symbols are resolved at once, their failures cached like any info
+    known = {ticker: is_known_symbol(ticker) for ticker in tickers}
+    unknown = [ticker for ticker in tickers if known[ticker] is None]
+    infos = dict(zip(unknown, run_parallel(fetch_info, unknown)))
+    return [ticker for ticker in tickers if known[ticker] or (known[ticker] is None and infos[ticker] is not None)]
+
+def suggest_tickers(ticker, limit=5):
+    suggestions = search_symbols(ticker, limit=limit)
+    if not suggestions:
+        suggestions = search_symbols(ticker[:-1], limit=limit)
+    return [symbol for symbol, name in suggestions]
+
+# Widest period cached per (ticker, interval) and its expiry instant, updated
+# by the run_parallel workers too
+_windows = {}
+_windows_lock = threading.Lock()
+
 def fetch_history(ticker, period="3mo", interval="1d"):
-    ticker = yf.Ticker(ticker)
-    hist = ticker.history(
+    # Only the widest window loaded for a series is cached, any shorter period
+    # is sliced out of it
+    expires = next_expiry(ticker, interval).timestamp()
+    now = pd.Timestamp.now(tz="UTC")
+    with _windows_lock:
+        window = _windows.get((ticker, interval))
+    if window is not None and window[0] == expires and period_covers(window[1], period, now):
+        return slice_period(_fetch_history(ticker, window[1], interval, expires), period)
+
+    hist = _fetch_history(ticker, period, interval, expires)
+    with _windows_lock:
+        # Another thread may have loaded a window of the series meanwhile
+        window = _windows.get((ticker, interval))
+        if window is not None and window[0] == expires:
+            if period_covers(window[1], period, now):
+                if window[1] != period:
+                    _fetch_history.discard(ticker, period, interval, expires)
+                return hist
+            _fetch_history.discard(ticker, window[1], interval, expires)
+        _windows[(ticker, interval)] = (expires, period)
+    return hist
+
+# Calendar days per bar, on the long side: sessions are taken as 6.5 hours,
+# five a week, with room for holidays
+BAR_DAYS = {"1d": 1.5, "5d": 7.5, "1wk": 7.5, "1mo": 31, "3mo": 92}
+
+# Requests made at most to reach the lookback, when holidays or a short first
+# estimate leave it a few bars short
+LOOKBACK_TRIES = 3
+
+def _bar_days(interval):
+    if interval in BAR_DAYS:
+        return BAR_DAYS[interval]
+    minutes = int(interval[:-1]) * (60 if interval.endswith("h") else 1)
+    return minutes / 390 * 1.5
+
+def fetch_history_lookback(ticker, period, interval, bars):
+    # The bars of a period preceded by up to `bars` earlier ones, and how many
+    # were added. The store is asked for the bars since a start estimated
+    # from `bars`, so it only downloads that prefix.
+    hist = fetch_history(ticker, period=period, interval=interval)
+    if bars <= 0 or hist.empty or period == "max":
+        return hist, 0
+    now = pd.Timestamp.now(tz=hist.index.tz)
+    limit = INTRADAY_LIMITS.get(interval)
+    # Yahoo serves intraday bars this far back only
+    oldest = (now - pd.Timedelta(days=limit - 1)).normalize() if limit else None
+    start, wide, extra = hist.index[0], hist, 0
+    for _ in range(LOOKBACK_TRIES):
+        # At least a long weekend back, or a few missing bars would not move it
+        start = start - pd.Timedelta(days=max((bars - extra) * _bar_days(interval), 4))
+        # Never after the period's own start, so the window covers the period
+        start = min(start, period_start(period, now)).normalize()
+        if oldest is not None:
+            start = max(start, oldest)
+        if start >= wide.index[0]:
+            break
+        wide = fetch_history(ticker, period=start, interval=interval)
+        extra = len(wide) - len(slice_period(wide, period))
+        if extra >= bars or wide.index[0] > start + pd.Timedelta(days=max(4, _bar_days(interval))):
+            # Enough bars, or the series starts later than asked
+            break
+        start = wide.index[0]
+    return wide.iloc[max(extra - bars, 0):], min(extra, bars)
+
+@cached("history")
+def _fetch_history(ticker, period, interval, expires):
+    hist = load_history(
+        ticker,
         period=period,
-        interval=interval
+        interval=interval,
+        expires=expires
     )
     return hist
 
-@st.cache_data
+def with_indicators(df, ticker, period, interval, indicators):
+    # Adds indicator columns to a frame of fetch_history(ticker, period,
+    # interval). Each indicator is cached on its own until the history
+    # expires, so a rerun only computes the ones just selected, and is warmed
+    # up on the bars before the period, which are then trimmed off.
+    expires = next_expiry(ticker, interval).timestamp()
+    columns = {}
+    for indicator in indicators:
+        values = _fetch_indicator(ticker, period, interval, expires, indicator)
+        if not values.index.equals(df.index):
+            # The history moved on between the two lookups
+            return add_indicators(df, indicators, key=(ticker, interval))
+        columns.update(values.items())
+    return df.assign(**columns)
+
+@cached("indicators")
+def _fetch_indicator(ticker, period, interval, expires, indicator):
+    hist, extra = fetch_history_lookback(ticker, period, interval, indicator_lookback(indicator))
+    columns = stream_indicators((ticker, interval), hist, [indicator])
+    return pd.DataFrame(columns, index=hist.index).iloc[extra:]
+
+def with_panel_indicators(hists, period, interval, indicators):
+    # with_indicators for a comparison: the warmed-up series of every ticker
+    # go through the indicator engine together, as one panel per lookback so
+    # the values match the single ticker charts
+    if not indicators:
+        return hists
+    tickers = list(hists)
+    warmed = run_parallel(lambda ticker: fetch_history_lookback(ticker, period, interval, lookback(indicators)), tickers)
+    groups = {}
+    for indicator in indicators:
+        groups.setdefault(indicator_lookback(indicator), []).append(indicator)
+    columns = [{} for _ in tickers]
+    for bars, group in groups.items():
+        frames = [hist.iloc[max(extra - bars, 0):] for hist, extra in warmed]
+        for values, computed, (hist, extra) in zip(columns, compute_panel(frames, group), warmed):
+            values.update({name: column[min(extra, bars):] for name, column in computed.items()})
+    result = {}
+    for ticker, (hist, extra), values in zip(tickers, warmed, columns):
+        df = hists[ticker]
+        if hist.index[extra:].equals(df.index):
+            result[ticker] = df.assign(**values)
+        else:
+            # The history moved on between the two lookups
+            result[ticker] = add_indicators(df, indicators)
+    return result
+
+def fetch_history_batch(tickers, period="3mo", interval="1d"):
+    # One bulk download refreshes the store for every stale ticker, after which
+    # each per-ticker cache entry is filled from the store without a request
+    expires = {ticker: next_expiry(ticker, interval).timestamp() for ticker in tickers}
+    tzs = {}
+    for ticker, info in zip(tickers, run_parallel(fetch_info, tickers)):
+        if info is not None:
+            tzs[ticker] = info.get("exchangeTimezoneName")
+    load_history_batch(tickers, period=period, interval=interval, expires=expires, tzs=tzs)
+    return {ticker: fetch_history(ticker, period=period, interval=interval) for ticker in tickers}
+
+@cached("statements")
+def fetch_statements(ticker):
+    # Annual and quarterly statements fetched together on one Ticker object
+    statements = get_provider().statements(ticker)
+    return statements
+
 def fetch_balance(ticker, tp="Annual"):
-    ticker = yf.Ticker(ticker)
-    if tp == "Annual":
-        bs = ticker.balance_sheet
-    else:
-        bs = ticker.quarterly_balance_sheet
-    return bs
+    return fetch_statements(ticker)[tp]["balance"]
 
-@st.cache_data
 def fetch_income(ticker, tp="Annual"):
-    ticker = yf.Ticker(ticker)
-    if tp == "Annual":
-        ins = ticker.income_stmt
-    else:
-        ins = ticker.quarterly_income_stmt
-    return ins
+    return fetch_statements(ticker)[tp]["income"]
 
-@st.cache_data
 def fetch_cash(ticker, tp="Annual"):
-    ticker = yf.Ticker(ticker)
-    if tp == "Annual":
-        cf = ticker.cashflow
-    else:
-        cf = ticker.quarterly_cashflow
-    return cf
+    return fetch_statements(ticker)[tp]["cash"]
 
-@st.cache_data
+@cached("history")
 def fetch_splits(ticker):
-    ticker = yf.Ticker(ticker)
-    return ticker.splits
+    hist = get_provider().history(ticker, period="max")
+    # Delisted or unknown tickers come back without any column
+    splits = hist.get("Stock Splits", pd.Series(dtype=float))
+    return splits[splits != 0]
+
+def refresh_tickers(tickers, kind=None):
+    # Scoped refresh: only these tickers' entries are dropped, and their stored
+    # series expired, so other users keep hitting the cache
+    removed = invalidate(tickers, kind)
+    if kind == "history":
+        removed += invalidate(tickers, "indicators")
+    if kind in (None, "history"):
+        expire_store(tickers)
+    return removed
+
+@st.cache_resource
+def quote_boards():
+    return QuoteBoards()
+
+def fetch_tables(urls):
+    # Overview boards are fetched concurrently and served stale-while-revalidate
+    return quote_boards().get(urls)
 
-@st.cache_data
 def fetch_table(url):
-    df = pd.read_html(url)
-    return df[0]
+    return fetch_tables([url])[url]
 
 
 def format_value(value):
@@ -86,6 +267,30 @@ def remove_duplicates(lst):
             seen.add(item)
     return result
 
+def show_quote_board(df, rows, cols, symbols=None, with_symbol=True):
+    if df is None:
+        st.caption("Loading quotes...")
+        return
+
+    with st.container(border=True):
+        i = 0
+        for _ in range(rows):
+            for col in st.columns(cols, gap="small"):
+                with col:
+                    if symbols:
+                        row = df[df['Symbol'] == symbols[i]].iloc[0]
+                    else:
+                        row = df.iloc[i]
+                    name = row['Name']
+                    symbol = row['Symbol']
+                    price, change, change_pt = row['Price'].split()
+                    st.metric(
+                        label=f'{name} ({symbol})' if with_symbol else f'{name}',
+                        value=f'{price}',
+                        delta=f'{change} {change_pt}'
+                    )
+                i += 1
+
 def top_table(df):
     fig = go.Figure(data=[go.Table(
         header=dict(values=list(df.columns),
@@ -169,7 +374,7 @@ def plot_candles_stick_bar(df, title=""):
     rows = 1
     row_heights = [7]
     for col_name in df.columns:
-        if col_name in ['Volume', 'MACD', 'ATR', 'RSI']:
+        if col_name == 'Volume' or indicator_style(col_name) == "row":
             rows += 1
             row_heights.append(3)
 
@@ -193,7 +398,7 @@ def plot_candles_stick_bar(df, title=""):
 
     for col_name in df.columns:
 
-        if 'SMA' in col_name or 'EMA' in col_name:
+        if indicator_style(col_name) == "overlay":
             fig.add_trace(go.Scatter(x=df.index,
                                      y=df[col_name],
                                      mode='lines',
@@ -270,7 +475,7 @@ def plot_candles_stick_bar(df, title=""):
                                      marker_color=MACD_colors),
                               row=row, col=1)
 
-        elif col_name == 'ATR':
+        elif col_name == 'RSI':
             row += 1
 
             fig.add_trace(go.Scatter(x=df.index,
@@ -279,9 +484,13 @@ def plot_candles_stick_bar(df, title=""):
                                      ),
                           row=row, col=1)
 
-            fig.update_yaxes(title_text="ATR", row=row, col=1)
+            fig.update_yaxes(title_text="RSI", row=row, col=1)
 
-        elif col_name == 'RSI':
+            fig.add_hline(y=70, line_dash="dash", annotation_text='top', row=row, col=1)
+            fig.add_hline(y=30, line_dash="dash", annotation_text='bottom', row=row, col=1)
+            fig.add_hrect(y0=30, y1=70, fillcolor="blue", opacity=0.25, line_width=0, row=row, col=1)
+
+        elif indicator_style(col_name) == "row":
             row += 1
 
             fig.add_trace(go.Scatter(x=df.index,
@@ -290,11 +499,7 @@ def plot_candles_stick_bar(df, title=""):
                                      ),
                           row=row, col=1)
 
-            fig.update_yaxes(title_text="RSI", row=row, col=1)
-
-            fig.add_hline(y=70, line_dash="dash", annotation_text='top', row=row, col=1)
-            fig.add_hline(y=30, line_dash="dash", annotation_text='bottom', row=row, col=1)
-            fig.add_hrect(y0=30, y1=70, fillcolor="blue", opacity=0.25, line_width=0, row=row, col=1)
+            fig.update_yaxes(title_text=col_name, row=row, col=1)
 
     fig.update_layout(
         title=title,
@@ -363,39 +568,96 @@ def plot_candles_stick(df, title="", time_span=None):
     return fig
 
 def plot_line_multiple(df, title=""):
-    fig = go.Figure()
+    # Moving averages are drawn on the percent change scale of their ticker,
+    # oscillators get a row each below it. Oscillators in price units (ATR,
+    # MACD) are divided by the ticker's first close like the prices, so
+    # tickers of different prices share their axis.
+    averages = [col for col in df.columns if indicator_style(col) == "overlay"]
+    oscillators = [col for col in df.columns if indicator_style(col) == "row"]
+    rows = 1 + len(oscillators)
+
+    fig = make_subplots(rows=rows, cols=1, shared_xaxes=True,
+                        vertical_spacing=0.05,
+                        row_heights=[7] + [3] * len(oscillators)
+                        )
+
+    colors = pc.qualitative.Plotly
 
     dfs = df.groupby('Ticker')
 
-    for df_name, df in dfs:
+    for i, (df_name, df) in enumerate(dfs):
+        color = colors[i % len(colors)]
+
         fig.add_trace(go.Scatter(x=df.index,
                                  y=df['Pct_change'],
                                  mode='lines',
                                  name=f'{df_name}',
                                  meta=df_name,
-                                 hovertemplate='%{meta}: %{y:.2f}<br><extra></extra>', )
-                      )
+                                 line=dict(color=color),
+                                 legendgroup=df_name,
+                                 hovertemplate='%{meta}: %{y:.2f}<br><extra></extra>', ),
+                      row=1, col=1)
 
-    fig.add_hline(y=0, line_dash="dash")
+        base = df['Close'].iloc[0]
+
+        for col_name in averages:
+            fig.add_trace(go.Scatter(x=df.index,
+                                     y=(df[col_name] - base) / base,
+                                     mode='lines',
+                                     name=f'{df_name} {col_name}',
+                                     meta=f'{df_name} {col_name}',
+                                     line=dict(color=color, dash='dot', width=1),
+                                     legendgroup=df_name,
+                                     hovertemplate='%{meta}: %{y:.2f}<br><extra></extra>', ),
+                          row=1, col=1)
+
+        for row, col_name in enumerate(oscillators, start=2):
+            scale_free = indicator_scale_free(col_name)
+            fig.add_trace(go.Scatter(x=df.index,
+                                     y=df[col_name] if scale_free else df[col_name] / base,
+                                     mode='lines',
+                                     name=f'{df_name} {col_name}',
+                                     meta=f'{df_name} {col_name}',
+                                     line=dict(color=color),
+                                     legendgroup=df_name,
+                                     showlegend=False,
+                                     hovertemplate='%{meta}: %{y:.2f}<br><extra></extra>' if scale_free
+                                     else '%{meta}: %{y:.2%}<br><extra></extra>', ),
+                          row=row, col=1)
+
+    fig.add_hline(y=0, line_dash="dash", row=1, col=1)
+
+    for row, col_name in enumerate(oscillators, start=2):
+        fig.update_yaxes(title_text=col_name, side='right', row=row, col=1,
+                         tickformat=None if indicator_scale_free(col_name) else '.1%')
+
+        if col_name == 'RSI':
+            fig.add_hline(y=70, line_dash="dash", row=row, col=1)
+            fig.add_hline(y=30, line_dash="dash", row=row, col=1)
+
+    fig.update_xaxes(
+        showspikes=True,  # Enable vertical spikes
+        spikemode='across',  # Draw spikes across the entire plot
+        spikesnap='cursor',  # Snap spikes to the cursor position
+        showline=True,  # Show axis line
+        showgrid=True,  # Show grid lines
+        spikecolor='black',  # Custom color for spikes
+        spikethickness=1,  # Custom thickness for spikes
+    )
+
+    fig.update_xaxes(
+        title_text='Date',
+        rangeslider=dict(
+            visible=True,
+            thickness=0.1
+        ),
+        row=rows, col=1
+    )
 
     fig.update_layout(
         title=title,
-        xaxis_title='Date',
         yaxis_title='Percentage change',
         hovermode='x',
-        xaxis=dict(
-            showspikes=True,  # Enable vertical spikes
-            spikemode='across',  # Draw spikes across the entire plot
-            spikesnap='cursor',  # Snap spikes to the cursor position
-            showline=True,  # Show axis line
-            showgrid=True,  # Show grid lines
-            spikecolor='black',  # Custom color for spikes
-            spikethickness=1,  # Custom thickness for spikes
-            rangeslider=dict(
-                visible=True,
-                thickness=0.1
-            ),
-        ),
         yaxis=dict(
             tickformat='.0%',
             showspikes=True,  # Enable horizontal spikes
@@ -416,7 +678,7 @@ def plot_line_multiple(df, title=""):
         ),
         showlegend=True,
         # xaxis_rangeslider_visible=True,
-        height=800
+        height=800 + 200 * len(oscillators)
     )
 
     return fig
@@ -990,9 +1252,9 @@ def plot_balance_multiple(TICKERS):
     fig = go.Figure()
     offset_max = 0
 
-    for ticker in TICKERS:
-        data = yf.Ticker(ticker)
-        bs = data.balance_sheet
+    balances = run_parallel(fetch_balance, TICKERS)
+
+    for ticker, bs in zip(TICKERS, balances):
         df = bs.iloc[:, :4]
         df = df[df.columns[::-1]]
         df.columns = pd.to_datetime(df.columns).strftime('%b %d, %Y')
@@ -1140,13 +1402,13 @@ def plot_eps(df, ticker):
 def plot_pe_ratio(df, ticker):
     df1 = df.loc['Basic EPS'].iloc[::-1].to_frame()
 
-    data = yf.Ticker(ticker)
-    hist = data.history(
-        period="5y",
-        interval="1d"
-    )
-    df2 = hist.copy()
+    # Only the closes around the EPS dates are needed, with a few days of margin
+    # for dates that fall on a weekend or holiday
+    start = df1.index.min() - pd.Timedelta(days=7)
+    hist = fetch_history(ticker, period=period_since(start, pd.Timestamp.now()), interval="1d")
+    df2 = hist[['Close']]
     df2.index = hist.index.tz_localize(None)
+    df2 = df2.loc[start:df1.index.max()]
 
     merge = pd.merge_asof(df1, df2, left_index=True, right_index=True, direction='backward')
 
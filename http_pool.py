@@ -0,0 +1,67 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# One keep-alive session shared by every Yahoo request of the process, so TCP
+# and TLS connections are reused across tickers, endpoints and user sessions.
+POOL_HOSTS = 10
+POOL_SIZE = 16
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+}
+
+_session = None
+_stats = {"requests": 0, "seconds": 0.0, "status": {}}
+_lock = threading.Lock()
+
+
+def _on_response(response, *args, **kwargs):
+    with _lock:
+        _stats["requests"] += 1
+        _stats["seconds"] += response.elapsed.total_seconds()
+        status = _stats["status"]
+        status[response.status_code] = status.get(response.status_code, 0) + 1
+    # yfinance swallows some HTTP errors; raising here lets the rate limiter
+    # see every 429 and back off
+    if response.status_code == 429:
+        response.raise_for_status()
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            # A full pool makes callers wait for a free connection rather than
+            # opening throwaway ones
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(_on_response)
+            _session = session
+        return _session
+
+
+def session_stats():
+    session = get_session()
+    opened = 0
+    pools = 0
+    for adapter in set(session.adapters.values()):
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                pools += 1
+                opened += pool.num_connections
+    with _lock:
+        requests_made = _stats["requests"]
+        return {
+            "requests": requests_made,
+            "connections_opened": opened,
+            "pools": pools,
+            "reuse": round(1 - opened / requests_made, 3) if requests_made else None,
+            "avg_ms": round(1000 * _stats["seconds"] / requests_made, 1) if requests_made else None,
+            "status": dict(_stats["status"]),
+        }
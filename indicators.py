@@ -0,0 +1,617 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Technical indicators shared by the market pages. Every requested indicator
+# is computed in one go from contiguous float64 arrays. Indicators are
+# registered as graphs of intermediate series (EMAs, rolling means, the true
+# range, returns); an intermediate several of them use is evaluated once.
+#
+# Each building block keeps the little state it needs to carry on where it
+# stopped, so a full computation is one extend() over all the bars and a
+# stream only extends with the bars added since its previous update, with bit
+# for bit the same results.
+
+# Entries of the indicator pickers, filled by register_indicator
+INDICATOR_OPTIONS = []
+
+ATR_WINDOW = 14
+RSI_WINDOW = 14
+MACD_SPANS = (12, 26, 9)
+
+# Largest factor the chunked EMA scales partial sums by before it rebases
+EMA_MAX_SCALE = 1e200
+
+# Weight the first value of an EMA may still carry once it is warmed up
+EMA_SEED_WEIGHT = 0.01
+
+# Streams kept, one per (ticker, interval, first bar, indicators)
+MAX_STREAMS = 256
+
+
+def ema_warmup(span):
+    # Bars after which the seed's weight (1 - alpha)^n drops below EMA_SEED_WEIGHT
+    return int(np.ceil(np.log(EMA_SEED_WEIGHT) / np.log(1.0 - 2.0 / (span + 1.0))))
+
+
+def _column(values, ndim):
+    # A 1-D array shaped to broadcast along the first axis of ndim-D arrays
+    return values.reshape((-1,) + (1,) * (ndim - 1))
+
+
+class Buffer:
+    # Growable array with amortised O(1) appends along its first axis
+
+    def __init__(self, dtype, values):
+        values = np.asarray(values, dtype=dtype)
+        self.data = np.empty((max(16, len(values)),) + values.shape[1:], dtype=dtype)
+        self.size = 0
+        self.extend(values)
+
+    def append(self, count):
+        # Writable slots for the next `count` values
+        end = self.size + count
+        if end > len(self.data):
+            data = np.empty((max(end, 2 * len(self.data)),) + self.data.shape[1:], dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        slots = self.data[self.size:end]
+        self.size = end
+        return slots
+
+    def extend(self, values):
+        self.append(len(values))[:] = values
+
+    def view(self):
+        return self.data[:self.size]
+
+
+class Cumulative:
+    # Zero-prefixed running sums and counts of the non-NaN values so far.
+    # Counts are None until a value is missing.
+
+    def __init__(self):
+        self.totals = None
+        self.counts = None
+
+    def extend(self, values):
+        # Returns (self, first new bar) for rolling_mean
+        if self.totals is None:
+            self.totals = Buffer(np.float64, np.zeros((1,) + values.shape[1:]))
+        n = self.totals.size - 1
+        last = self.totals.data[n].copy()
+        totals = self.totals.append(len(values))
+        valid = ~np.isnan(values)
+        if valid.all():
+            totals[:] = values
+        else:
+            np.copyto(totals, np.where(valid, values, 0.0))
+            if self.counts is None:
+                counts = np.broadcast_to(_column(np.arange(n + 1), values.ndim), (n + 1,) + values.shape[1:])
+                self.counts = Buffer(np.int64, counts)
+        if len(totals):
+            totals[0] += last
+        np.cumsum(totals, axis=0, out=totals)
+        if self.counts is not None:
+            self.counts.extend(np.cumsum(valid, axis=0) + self.counts.data[n])
+        return self, n
+
+    @property
+    def size(self):
+        # Values added so far
+        return 0 if self.totals is None else self.totals.size - 1
+
+    def checkpoint(self):
+        return self.totals, None if self.totals is None else self.totals.size, self.counts
+
+    def restore(self, checkpoint):
+        self.totals, size, self.counts = checkpoint
+        if self.totals is not None:
+            self.totals.size = size
+        if self.counts is not None:
+            self.counts.size = size
+
+
+def rolling_mean(sums, window):
+    # Mean of the non-NaN values in the trailing window of each bar a
+    # Cumulative was just extended with, NaN when there are none, like
+    # Series.rolling(window, min_periods=1).mean()
+    sums, start = sums
+    totals = sums.totals.view()
+    n = len(totals) - 1 - start
+    # Windows still filling up start at the first bar
+    head = min(max(window - start - 1, 0), n)
+    total = np.empty((n,) + totals.shape[1:])
+    total[:head] = totals[start + 1:start + 1 + head]
+    np.subtract(totals[start + 1 + head:], totals[start + 1 + head - window:len(totals) - window], out=total[head:])
+    if sums.counts is None:
+        # Nothing missing, no window is empty
+        count = _column(np.minimum(np.arange(start + 1, start + 1 + n), window), totals.ndim)
+        return total / count
+    counts = sums.counts.view()
+    count = np.empty(total.shape, dtype=np.int64)
+    count[:head] = counts[start + 1:start + 1 + head]
+    np.subtract(counts[start + 1 + head:], counts[start + 1 + head - window:len(counts) - window], out=count[head:])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    mean[count == 0] = np.nan
+    return mean
+
+
+def ffill(values, last=np.nan):
+    # Missing values carry the previous one along the first axis, `last`
+    # before the first
+    gaps = np.isnan(values)
+    if values.ndim > 1:
+        # Only the columns with gaps
+        columns = gaps.any(axis=0)
+        if columns.all() or not columns.any():
+            return _ffill(values, gaps, last)
+        values = values.copy()
+        last = np.broadcast_to(last, values.shape[1:])
+        values[:, columns] = _ffill(values[:, columns], gaps[:, columns], last[columns])
+        return values
+    return _ffill(values, gaps, last)
+
+
+def _ffill(values, gaps, last):
+    if not gaps.any():
+        return values
+    values = np.concatenate((np.broadcast_to(last, (1,) + values.shape[1:]), values))
+    gaps = np.concatenate((np.zeros((1,) + gaps.shape[1:], dtype=bool), gaps))
+    index = np.where(gaps, 0, _column(np.arange(len(values)), values.ndim))
+    np.maximum.accumulate(index, axis=0, out=index)
+    return np.take_along_axis(values, index, axis=0)[1:]
+
+
+class Filled:
+    # Forward fill across calls
+
+    def __init__(self):
+        self.last = np.nan
+
+    def extend(self, values):
+        values = ffill(values, self.last)
+        if len(values):
+            self.last = values[-1]
+        return values
+
+    def checkpoint(self):
+        return self.last
+
+    def restore(self, last):
+        self.last = last
+
+
+class Shifted:
+    # Each value's predecessor, NaN before the first
+
+    def __init__(self):
+        self.last = np.nan
+
+    def extend(self, values):
+        last = np.broadcast_to(self.last, (1,) + values.shape[1:])
+        previous = np.concatenate((last, values[:-1]))
+        if len(values):
+            self.last = values[-1]
+        return previous
+
+    checkpoint = Filled.checkpoint
+    restore = Filled.restore
+
+
+class Ema:
+    # Series.ewm(span, adjust=False, min_periods=1).mean() as a closed form,
+    # y[t] = a^(t+1) y[-1] + alpha a^t sum(a^-k x[k]) with y[-1] = x[0],
+    # evaluated in chunks short enough for a^-k to stay finite. Missing values
+    # carry the previous one.
+    #
+    # Columns of a panel share the chunks. One that starts later is seeded
+    # with its first value, which the EMA keeps until then, so it agrees with
+    # the column's own EMA up to rounding.
+
+    def __init__(self, span):
+        alpha = 2.0 / (span + 1.0)
+        decay = 1.0 - alpha
+        self.chunk = max(1, int(np.log(EMA_MAX_SCALE) / -np.log(decay))) if decay > 0 else 1
+        self.powers = decay ** np.arange(self.chunk + 1)
+        self.weights = alpha * self.powers[:-1]
+        self.inverse = 1.0 / self.powers[:-1]
+        # Position in the current chunk, its partial sum, the value the chunk
+        # starts from (None before the first value) and the last input
+        self.state = (0, 0.0, None, np.nan)
+
+    def extend(self, values):
+        k, partial, previous, last = self.state
+        out = np.full(values.shape, np.nan)
+        first = 0
+        late = None
+        x = values
+        if previous is None:
+            valid = ~np.isnan(values)
+            rows = valid if values.ndim == 1 else valid.any(axis=tuple(range(1, values.ndim)))
+            rows = np.flatnonzero(rows)
+            if not len(rows):
+                return out
+            first = rows[0]
+            x, valid = values[first:], valid[first:]
+            seeds = valid.argmax(axis=0)
+            previous = last = np.take_along_axis(x, np.expand_dims(seeds, 0), axis=0)[0]
+            if values.ndim == 1:
+                previous = last = previous.item()
+            elif not valid[0].all():
+                # Bars before a column's first value hold the seed, and stay
+                # empty in the output
+                late = ~np.maximum.accumulate(valid, axis=0)
+                x = np.where(late, previous, x)
+        x = ffill(x, last)
+
+        ndim = values.ndim
+        start = 0
+        while start < len(x):
+            size = min(self.chunk - k, len(x) - start)
+            y = out[first + start:first + start + size]
+            np.multiply(x[start:start + size], _column(self.inverse[k:k + size], ndim), out=y)
+            y[0] += partial
+            np.cumsum(y, axis=0, out=y)
+            partial = y[-1].copy()
+            y *= _column(self.weights[k:k + size], ndim)
+            y += _column(self.powers[k + 1:k + size + 1], ndim) * previous
+            if k + size == self.chunk:
+                k, partial, previous = 0, 0.0, y[-1].copy()
+            else:
+                k += size
+            start += size
+        if len(x):
+            last = x[-1]
+        self.state = (k, partial, previous, last)
+        if late is not None:
+            out[first:][late] = np.nan
+        return out
+
+    def checkpoint(self):
+        return self.state
+
+    def restore(self, state):
+        self.state = state
+
+
+class Stateless:
+    # A node computed from its inputs alone
+
+    def __init__(self, func):
+        self.func = func
+
+    def extend(self, *inputs):
+        return self.func(*inputs)
+
+    def checkpoint(self):
+        return None
+
+    def restore(self, checkpoint):
+        pass
+
+
+# Graph nodes are tuples (op, *args) whose tuple args are input nodes and the
+# rest parameters. Equal tuples are one node, evaluated once per extend().
+# Each op makes the block computing it and declares the bars it needs before
+# its first complete value, on top of those its inputs need.
+OPS = {
+    "ema": (Ema, ema_warmup),
+    "sums": (Cumulative, lambda: 0),
+    "mean": (lambda window: Stateless(lambda sums: rolling_mean(sums, window)), lambda window: window - 1),
+    "shift": (Shifted, lambda: 1),
+    "ffill": (Filled, lambda: 0),
+    "apply": (Stateless, lambda func: 0),
+}
+
+CLOSE = ("input", "Close")
+HIGH = ("input", "High")
+LOW = ("input", "Low")
+
+
+def ema(node, span):
+    return ("ema", node, span)
+
+
+def sma(node, window):
+    return ("mean", ("sums", node), window)
+
+
+def shift(node):
+    return ("shift", node)
+
+
+def filled(node):
+    # Missing values carry the previous one
+    return ("ffill", node)
+
+
+def apply(func, *nodes):
+    # Element-wise func(*inputs); give one module-level function to nodes
+    # that should be shared
+    return ("apply", func) + nodes
+
+
+def _true_range(high, low, previous):
+    return np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+
+
+def _returns(close, previous):
+    return (close / previous - 1) * 100
+
+
+def _gains(returns):
+    return np.where(returns > 0, returns, 0.0)
+
+
+def _losses(returns):
+    return np.where(returns < 0, -returns, 0.0)
+
+
+TRUE_RANGE = apply(_true_range, HIGH, LOW, shift(CLOSE))
+# Percent changes, over missing closes taken from the previous close
+RETURNS = apply(_returns, filled(CLOSE), shift(filled(CLOSE)))
+GAINS = apply(_gains, RETURNS)
+LOSSES = apply(_losses, RETURNS)
+
+
+def _inputs(node):
+    return [arg for arg in node[1:] if isinstance(arg, tuple)]
+
+
+def node_lookback(node):
+    if node[0] == "input":
+        return 0
+    params = [arg for arg in node[1:] if not isinstance(arg, tuple)]
+    return OPS[node[0]][1](*params) + max((node_lookback(arg) for arg in _inputs(node)), default=0)
+
+
+# name -> (outputs, overlay), see register_indicator
+_registry = {}
+
+
+def register_indicator(name, outputs, overlay=False, options=None, scale_free=False):
+    # Makes an indicator available to every chart. `outputs` takes the number
+    # after the name ("SMA_20" -> 20, None without one) and returns
+    # {column: node}, the indicator's own column first. Overlays are drawn
+    # over the prices, the others on a row of their own. `options` are the
+    # picker entries, "NAME_X" letting the user choose the number.
+    # `scale_free` indicators (a percentage, an index like RSI) compare across
+    # tickers as they are; the others are in price units.
+    _registry[name] = (outputs, overlay, scale_free)
+    for option in options or [name]:
+        if option not in INDICATOR_OPTIONS:
+            INDICATOR_OPTIONS.append(option)
+
+
+def _parse(indicator):
+    if indicator in _registry:
+        return indicator, None
+    name, _, number = indicator.rpartition("_")
+    if name in _registry and number.isdigit():
+        return name, int(number)
+    raise ValueError(f"Invalid indicator: {indicator}")
+
+
+def indicator_outputs(indicator):
+    # {column: node} of an indicator such as "SMA_20" or "MACD"
+    name, number = _parse(indicator)
+    return _registry[name][0](number)
+
+
+def indicator_style(column):
+    # "overlay" or "row" for the main column of an indicator, None for any
+    # other column, like a price or an indicator's secondary output
+    try:
+        name, number = _parse(column)
+    except ValueError:
+        return None
+    outputs, overlay, _ = _registry[name]
+    if next(iter(outputs(number))) != column:
+        return None
+    return "overlay" if overlay else "row"
+
+
+def indicator_scale_free(column):
+    # Whether an indicator column can be compared across tickers without
+    # dividing it by the price
+    try:
+        name, _ = _parse(column)
+    except ValueError:
+        return False
+    return _registry[name][2]
+
+
+def indicator_lookback(indicator):
+    # Bars an indicator needs before the first one it is shown for, to be
+    # computed over full windows rather than with min_periods=1
+    return max((node_lookback(node) for node in indicator_outputs(indicator).values()), default=0)
+
+
+def lookback(indicators):
+    return max((indicator_lookback(indicator) for indicator in indicators), default=0)
+
+
+register_indicator("SMA", lambda n: {f"SMA_{n}": sma(CLOSE, n)}, overlay=True,
+                   options=['SMA_20', 'SMA_50', 'SMA_200', 'SMA_X'])
+register_indicator("EMA", lambda n: {f"EMA_{n}": ema(CLOSE, n)}, overlay=True,
+                   options=['EMA_20', 'EMA_50', 'EMA_200', 'EMA_X'])
+register_indicator("ATR", lambda _: {'ATR': sma(TRUE_RANGE, ATR_WINDOW)})
+
+
+def _macd(_):
+    short, long, signal = MACD_SPANS
+    macd = apply(np.subtract, ema(CLOSE, short), ema(CLOSE, long))
+    return {
+        'MACD': macd,
+        'Signal': ema(macd, signal),
+        'MACD_Hist': apply(np.subtract, macd, ema(macd, signal)),
+    }
+
+
+register_indicator("MACD", _macd)
+
+
+def _rsi(gain, loss):
+    return 100 - 100 / (1 + gain / loss)
+
+
+register_indicator("RSI", lambda _: {'RSI': apply(_rsi, sma(GAINS, RSI_WINDOW), sma(LOSSES, RSI_WINDOW))},
+                   scale_free=True)
+
+
+class Engine:
+    # Blocks of the graph behind one list of indicators, dependencies first;
+    # extend() takes the next bars as float64 arrays and returns their
+    # indicator columns
+
+    def __init__(self, indicators):
+        self.outputs = {}
+        for indicator in indicators:
+            self.outputs.update(indicator_outputs(indicator))
+        self.inputs = []
+        self.blocks = {}
+        for node in self.outputs.values():
+            self._add(node)
+
+    def _add(self, node):
+        if node[0] == "input":
+            if node[1] not in self.inputs:
+                self.inputs.append(node[1])
+            return
+        if node in self.blocks:
+            return
+        for arg in _inputs(node):
+            self._add(arg)
+        params = [arg for arg in node[1:] if not isinstance(arg, tuple)]
+        self.blocks[node] = OPS[node[0]][0](*params)
+
+    def checkpoint(self):
+        return {node: block.checkpoint() for node, block in self.blocks.items()}
+
+    def restore(self, checkpoint):
+        for node, block in self.blocks.items():
+            block.restore(checkpoint[node])
+
+    def extend(self, bars):
+        values = {("input", name): values for name, values in bars.items()}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for node, block in self.blocks.items():
+                values[node] = block.extend(*[values[arg] for arg in _inputs(node)])
+        return {column: values[node] for column, node in self.outputs.items()}
+
+
+def _bars(df, columns, start=0, end=None):
+    return {
+        col: np.ascontiguousarray(df[col].iloc[start:end].to_numpy(dtype=np.float64, na_value=np.nan))
+        for col in columns
+    }
+
+
+def compute_indicators(df, indicators):
+    # {column: values} for the requested indicators over the whole frame
+    engine = Engine(indicators)
+    return engine.extend(_bars(df, engine.inputs))
+
+
+def compute_panel(frames, indicators):
+    # compute_indicators for several frames in one pass over a (bars, frames)
+    # panel. Series are right-aligned on their last bar rather than joined on
+    # time, so each column holds exactly its frame's bars and no window spans
+    # another exchange's holiday; shorter ones are padded with leading NaN.
+    frames = list(frames)
+    length = max((len(df) for df in frames), default=0)
+    engine = Engine(indicators)
+    bars = {}
+    for col in engine.inputs:
+        panel = np.full((length, len(frames)), np.nan)
+        for j, df in enumerate(frames):
+            panel[length - len(df):, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        bars[col] = panel
+    result = engine.extend(bars)
+    return [{name: values[length - len(df):, j] for name, values in result.items()} for j, df in enumerate(frames)]
+
+
+class IndicatorStream:
+    # Indicators of one growing series, updated in O(1) per added bar. The
+    # last bar may still be forming, so it is never committed: every update
+    # rewinds to the checkpoint taken before it and feeds it again.
+
+    def __init__(self, indicators):
+        self.indicators = list(indicators)
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.engine = Engine(self.indicators)
+        self.checkpoint = self.engine.checkpoint()
+        self.outputs = {}
+        self.committed = 0
+        self.last = None
+
+    def _continues(self, df):
+        # The frame still holds the committed bars unchanged, as far as the
+        # time and close of the last of them tell
+        if self.last is None:
+            return True
+        n = self.committed
+        if len(df) < n or df.index[n - 1] != self.last[0]:
+            return False
+        close = df['Close'].iat[n - 1]
+        return close == self.last[1] or (np.isnan(close) and np.isnan(self.last[1]))
+
+    def _extend(self, bars):
+        for name, values in self.engine.extend(bars).items():
+            if name in self.outputs:
+                self.outputs[name].extend(values)
+            else:
+                self.outputs[name] = Buffer(np.float64, values)
+
+    def update(self, df):
+        # {column: values} for the frame, like compute_indicators. Only the
+        # new bars are computed; the columns handed back are copies, as the
+        # forming bar's slot is overwritten by the next update.
+        with self.lock:
+            if not self._continues(df):
+                self._reset()
+            n = len(df)
+            self.engine.restore(self.checkpoint)
+            for buffer in self.outputs.values():
+                buffer.size = self.committed
+            if n - 1 > self.committed:
+                self._extend(_bars(df, self.engine.inputs, self.committed, n - 1))
+                self.committed = n - 1
+                self.last = (df.index[n - 2], df['Close'].iat[n - 2])
+            self.checkpoint = self.engine.checkpoint()
+            self._extend(_bars(df, self.engine.inputs, self.committed, n))
+            return {name: buffer.data[:n].copy() for name, buffer in self.outputs.items()}
+
+
+_streams = OrderedDict()
+_streams_lock = threading.Lock()
+
+
+def stream_indicators(key, df, indicators):
+    # Indicator columns of a frame from the stream kept for `key`, usually
+    # (ticker, interval). Frames that start at another bar, like other
+    # periods, get streams of their own.
+    if df.empty:
+        return compute_indicators(df, indicators)
+    key = (key, df.index[0], tuple(indicators))
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None:
+            stream = _streams[key] = IndicatorStream(indicators)
+            while len(_streams) > MAX_STREAMS:
+                _streams.popitem(last=False)
+        _streams.move_to_end(key)
+    return stream.update(df)
+
+
+def add_indicators(df, indicators, key=None):
+    if not indicators:
+        return df
+    columns = compute_indicators(df, indicators) if key is None else stream_indicators(key, df, indicators)
+    return df.assign(**columns)
@@ -1,4 +1,5 @@
 import streamlit as st
+from cache import CACHE_ADMIN
 
 # --- PAGE SETUP ---
 
@@ -27,7 +28,17 @@ page_commodity = st.Page(
     icon=":material/oil_barrel:",
 )
 
-pg = st.navigation(pages=[page_price, page_financials, page_forex, page_commodity])
+page_cache = st.Page(
+    "views/Page_cache.py",
+    title="Cache",
+    icon=":material/storage:",
+)
+
+pages = [page_price, page_financials, page_forex, page_commodity]
+if CACHE_ADMIN:
+    pages.append(page_cache)
+
+pg = st.navigation(pages=pages)
 
 # --- SHARED ON ALL PAGES ---
 st.logo("imgs/logo.png")
@@ -0,0 +1,156 @@
+import pandas as pd
+
+# Regular trading sessions: timezone, open, close and trading weekdays (Mon=0).
+# Holidays are not modelled; a holiday simply behaves like an early close.
+EXCHANGES = {
+    "NYSE": ("America/New_York", "09:30", "16:00", range(5)),
+    "XETRA": ("Europe/Berlin", "09:00", "17:30", range(5)),
+    "LSE": ("Europe/London", "08:00", "16:30", range(5)),
+    "TSE": ("Asia/Tokyo", "09:00", "15:30", range(5)),
+    "HKEX": ("Asia/Hong_Kong", "09:30", "16:00", range(5)),
+    "BYMA": ("America/Argentina/Buenos_Aires", "11:00", "17:00", range(5)),
+    "FOREX": ("UTC", "00:00", "24:00", range(5)),
+    "FUTURES": ("UTC", "00:00", "24:00", range(5)),
+    "CRYPTO": ("UTC", "00:00", "24:00", range(7)),
+}
+
+SUFFIXES = {
+    ".DE": "XETRA",
+    ".F": "XETRA",
+    ".L": "LSE",
+    ".T": "TSE",
+    ".HK": "HKEX",
+    ".BA": "BYMA",
+    "=X": "FOREX",
+    "=F": "FUTURES",
+}
+
+INDICES = {
+    "^N225": "TSE",
+    "^GDAXI": "XETRA",
+    "^FTSE": "LSE",
+    "^HSI": "HKEX",
+    "^MERV": "BYMA",
+}
+
+CRYPTOS = ["BTC", "ETH", "USDT", "SOL", "XRP", "BNB", "DOGE", "ADA"]
+
+# Quotes are delayed, so keep a session "live" for a while after the bell
+SETTLE = pd.Timedelta(minutes=15)
+
+# How long the quote summary returned by fetch_info stays fresh during a session
+INFO_TTL = "5m"
+
+INTERVALS = {
+    "1m": pd.Timedelta(minutes=1),
+    "2m": pd.Timedelta(minutes=2),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "30m": pd.Timedelta(minutes=30),
+    "60m": pd.Timedelta(hours=1),
+    "90m": pd.Timedelta(minutes=90),
+    "1h": pd.Timedelta(hours=1),
+}
+
+
+def exchange_of(ticker):
+    if ticker in INDICES:
+        return INDICES[ticker]
+    if "-" in ticker and ticker.split("-")[0] in CRYPTOS:
+        return "CRYPTO"
+    for suffix, exchange in SUFFIXES.items():
+        if ticker.endswith(suffix):
+            return exchange
+    return "NYSE"
+
+
+def _session(exchange, day):
+    # Open and close of the session held on a calendar day, or None
+    tz, open_, close, weekdays = EXCHANGES[exchange]
+    if day.weekday() not in weekdays:
+        return None
+    start = day + pd.Timedelta(open_ + ":00")
+    end = day + pd.Timedelta(close + ":00")
+    return start, end
+
+
+def next_expiry(ticker, interval, now=None):
+    # Next instant at which cached data for (ticker, interval) goes stale.
+    # During a session intraday bars expire with every new bar and longer bars
+    # at the close; outside a session everything lasts until the next open.
+    exchange = exchange_of(ticker)
+    tz = EXCHANGES[exchange][0]
+    now = pd.Timestamp.now(tz=tz) if now is None else now.tz_convert(tz)
+    today = now.normalize().tz_localize(None)
+
+    for days in range(8):
+        day = today + pd.Timedelta(days=days)
+        session = _session(exchange, day)
+        if session is None:
+            continue
+        start, end = (ts.tz_localize(tz) for ts in session)
+        if now < start:
+            return start
+        if now < end + SETTLE:
+            step = INTERVALS.get(interval)
+            if step is None:
+                return end + SETTLE
+            # Bars are aligned on the session open
+            return min(start + ((now - start) // step + 1) * step, end + SETTLE)
+
+    return now + pd.Timedelta(days=1)
+
+
+def period_start(period, now):
+    # Returns the first timestamp covered by a period, None for "max".
+    # "1d" and "5d" count sessions rather than calendar days, see slice_period.
+    # A Timestamp stands for the bars from that instant on.
+    if isinstance(period, pd.Timestamp):
+        return period
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    if period.endswith("d"):
+        days = int(period[:-1])
+        return now.normalize() - pd.Timedelta(days=days * 7 // 5 + 4)
+    if period.endswith("mo"):
+        return now.normalize() - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("y"):
+        return now.normalize() - pd.DateOffset(years=int(period[:-1]))
+    raise ValueError(f"Invalid period: {period}")
+
+
+PERIODS = ["1mo", "3mo", "6mo", "1y", "2y", "5y", "10y"]
+
+
+def period_since(start, now):
+    # Shortest period reaching back to `start`
+    for period in PERIODS:
+        if period_start(period, now) <= start:
+            return period
+    return "max"
+
+
+def period_covers(period, other, now):
+    # Whether every bar of `other` is also in `period`
+    if period == "max":
+        return True
+    if other == "max":
+        return False
+    if isinstance(other, pd.Timestamp) and isinstance(period, str) and period.endswith("d") and period != "ytd":
+        # Sliced by sessions, the period may start after its period_start
+        return False
+    return period_start(period, now) <= period_start(other, now)
+
+
+def slice_period(df, period):
+    if df.empty or period == "max":
+        return df
+    if isinstance(period, str) and period.endswith("d") and period != "ytd":
+        sessions = df.index.normalize().unique()
+        start = sessions[-int(period[:-1]):][0]
+    else:
+        start = period_start(period, pd.Timestamp.now(tz=df.index.tz))
+    # Bars are sorted, a positional slice avoids building a mask and a copy
+    return df.iloc[df.index.searchsorted(start):]
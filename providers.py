@@ -0,0 +1,301 @@
+import os
+import re
+import json
+import time
+import pickle
+import logging
+import threading
+from io import StringIO
+
+import pandas as pd
+import yfinance as yf
+
+from market_hours import slice_period
+from singleflight import SingleFlight
+from ratelimit import limiter, is_rate_limited
+from http_pool import get_session, HEADERS
+
+# Every upstream call of the app goes through the active provider. Select it
+# with DATA_PROVIDER: "yahoo" (default), "replay:<fixtures dir>" to serve
+# recorded responses offline, or "record:<fixtures dir>" to capture them.
+PROVIDER = os.environ.get("DATA_PROVIDER", "yahoo")
+
+# Seconds added to every replayed call, or per method as "history=0.2,info=0.05"
+REPLAY_LATENCY = os.environ.get("REPLAY_LATENCY", "0")
+
+STATEMENTS = {
+    "Annual": {
+        "balance": "balance_sheet",
+        "income": "income_stmt",
+        "cash": "cashflow"
+    },
+    "Quarterly": {
+        "balance": "quarterly_balance_sheet",
+        "income": "quarterly_income_stmt",
+        "cash": "quarterly_cashflow"
+    }
+}
+
+
+class RateLimitedError(Exception):
+    pass
+
+
+class _ThreadErrors(logging.Handler):
+    # Collects the errors yfinance logs from the calling thread only, as other
+    # sessions may be downloading at the same time
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.messages = []
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.messages.append(record.getMessage())
+
+
+class YahooProvider:
+
+    # Every Ticker and download shares the pooled keep-alive session
+
+    def info(self, ticker):
+        return yf.Ticker(ticker, session=get_session()).info
+
+    def history(self, ticker, interval="1d", **kwargs):
+        # Errors are raised so a 429 can be told apart; anything else still
+        # ends in the empty frame yfinance returns by default
+        try:
+            return yf.Ticker(ticker, session=get_session()).history(interval=interval, raise_errors=True, **kwargs)
+        except Exception as e:
+            if is_rate_limited(e):
+                raise
+            print(f"Error fetching {ticker} history: {e}")
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"])
+
+    def download(self, tickers, interval="1d", **kwargs):
+        # yfinance logs per-ticker failures instead of raising them; a 429
+        # among them is raised so the rate limiter backs off and retries
+        errors = _ThreadErrors()
+        logger = logging.getLogger("yfinance")
+        logger.addHandler(errors)
+        try:
+            data = yf.download(tickers, interval=interval, session=get_session(), **kwargs)
+        finally:
+            logger.removeHandler(errors)
+        for message in errors.messages:
+            if is_rate_limited(RateLimitedError(message)):
+                raise RateLimitedError(message)
+        return data
+
+    def statements(self, ticker):
+        ticker = yf.Ticker(ticker, session=get_session())
+        return {
+            tp: {kind: getattr(ticker, attr) for kind, attr in kinds.items()}
+            for tp, kinds in STATEMENTS.items()
+        }
+
+    def table(self, url):
+        response = get_session().get(url, headers=HEADERS, timeout=10)
+        response.raise_for_status()
+        return pd.read_html(StringIO(response.text))[0]
+
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9^=.\-]+", "_", name).strip("_")
+
+
+def _paths(root, kind, name, ext):
+    folder = os.path.join(root, kind)
+    return folder, os.path.join(folder, f"{_slug(name)}.{ext}")
+
+
+class RecordingProvider:
+    # Passes calls through to another provider and saves what it returns as
+    # fixtures for ReplayProvider. History fixtures accumulate every bar seen.
+
+    def __init__(self, root, upstream=None):
+        self.root = root
+        self.upstream = upstream or RateLimitedProvider(YahooProvider())
+
+    def _dump(self, kind, name, value):
+        folder, path = _paths(self.root, kind, name, "pkl")
+        os.makedirs(folder, exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump(value, f)
+
+    def info(self, ticker):
+        info = self.upstream.info(ticker)
+        folder, path = _paths(self.root, "info", ticker, "json")
+        os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(info, f, default=str)
+        return info
+
+    def _record_history(self, ticker, interval, df):
+        if df.empty:
+            return
+        folder, path = _paths(self.root, "history", f"{ticker}_{interval}", "parquet")
+        os.makedirs(folder, exist_ok=True)
+        if os.path.exists(path):
+            old = pd.read_parquet(path)
+            df = pd.concat([old, df.tz_convert(old.index.tz)])
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+        df.to_parquet(path)
+
+    def history(self, ticker, interval="1d", **kwargs):
+        df = self.upstream.history(ticker, interval=interval, **kwargs)
+        self._record_history(ticker, interval, df)
+        return df
+
+    def download(self, tickers, interval="1d", **kwargs):
+        data = self.upstream.download(tickers, interval=interval, **kwargs)
+        if not isinstance(data.columns, pd.MultiIndex):
+            self._record_history(tickers[0], interval, data)
+        else:
+            for ticker in data.columns.get_level_values(0).unique():
+                df = data[ticker].dropna(how="all")
+                df.columns.name = None
+                self._record_history(ticker, interval, df)
+        return data
+
+    def statements(self, ticker):
+        statements = self.upstream.statements(ticker)
+        self._dump("statements", ticker, statements)
+        return statements
+
+    def table(self, url):
+        df = self.upstream.table(url)
+        self._dump("tables", url, df)
+        return df
+
+
+class ReplayProvider:
+    # Serves recorded fixtures with an optional artificial latency per call, so
+    # pages can be profiled and benchmarked without network access.
+
+    def __init__(self, root, latency=0.0):
+        self.root = root
+        self.latency = latency
+        self.calls = {}
+
+    def _call(self, method):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        delay = self.latency.get(method, 0) if isinstance(self.latency, dict) else self.latency
+        if delay:
+            time.sleep(delay)
+
+    def _load(self, kind, name):
+        path = _paths(self.root, kind, name, "pkl")[1]
+        if not os.path.exists(path):
+            raise KeyError(f"No recorded {kind} for {name}")
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def info(self, ticker):
+        self._call("info")
+        path = _paths(self.root, "info", ticker, "json")[1]
+        if not os.path.exists(path):
+            # What Yahoo answers for an unknown symbol
+            return {"trailingPegRatio": None}
+        with open(path) as f:
+            return json.load(f)
+
+    def _history(self, ticker, interval, period="1mo", start=None, end=None, **kwargs):
+        path = _paths(self.root, "history", f"{ticker}_{interval}", "parquet")[1]
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"])
+        df = pd.read_parquet(path)
+        if start is None and end is None:
+            return slice_period(df, period)
+        if start is not None:
+            df = df.loc[df.index >= pd.Timestamp(start).tz_convert(df.index.tz)]
+        if end is not None:
+            df = df.loc[df.index < pd.Timestamp(end).tz_convert(df.index.tz)]
+        return df
+
+    def history(self, ticker, interval="1d", **kwargs):
+        self._call("history")
+        return self._history(ticker, interval, **kwargs)
+
+    def download(self, tickers, interval="1d", **kwargs):
+        self._call("download")
+        kwargs = {key: kwargs[key] for key in ("period", "start", "end") if key in kwargs}
+        frames = {ticker: self._history(ticker, interval, **kwargs) for ticker in tickers}
+        if len(tickers) == 1:
+            return frames[tickers[0]]
+        # Like yfinance: one frame on a shared UTC index with (Ticker, Price) columns
+        frames = {ticker: df.tz_convert("UTC") for ticker, df in frames.items() if not df.empty}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames.values(), axis=1, keys=frames.keys(), names=["Ticker", "Price"], sort=True)
+
+    def statements(self, ticker):
+        self._call("statements")
+        return self._load("statements", ticker)
+
+    def table(self, url):
+        self._call("table")
+        return self._load("tables", url)
+
+
+class RateLimitedProvider:
+    # Every call spends from its endpoint's budget in the process-wide limiter
+    # and is retried with jittered backoff when Yahoo answers 429
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+
+    def __getattr__(self, method):
+        func = getattr(self.upstream, method)
+
+        def call(*args, **kwargs):
+            return limiter.call(method, func, *args, **kwargs)
+
+        return call
+
+
+class SingleFlightProvider:
+    # Identical upstream requests made while one is already in flight (from any
+    # session or thread) share its response instead of reaching Yahoo again.
+    # Followers get the very same object, which callers treat as read-only.
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.flights = SingleFlight()
+
+    def __getattr__(self, method):
+        func = getattr(self.upstream, method)
+
+        def call(*args, **kwargs):
+            key = repr((method, args, sorted(kwargs.items())))
+            return self.flights.do(key, func, *args, **kwargs)
+
+        return call
+
+
+def parse_latency(value):
+    if "=" not in value:
+        return float(value)
+    return {key: float(seconds) for key, seconds in (item.split("=") for item in value.split(","))}
+
+
+def make_provider(spec=PROVIDER, latency=REPLAY_LATENCY):
+    kind, _, root = spec.partition(":")
+    if kind == "replay":
+        return ReplayProvider(root, latency=parse_latency(latency))
+    if kind == "record":
+        return RecordingProvider(root)
+    return RateLimitedProvider(YahooProvider())
+
+
+_provider = SingleFlightProvider(make_provider())
+
+
+def get_provider():
+    return _provider
+
+
+def set_provider(provider):
+    global _provider
+    _provider = SingleFlightProvider(provider)
@@ -0,0 +1,131 @@
+import time
+import random
+import threading
+
+# Process-wide budgets per upstream endpoint: sustained requests per second and
+# burst size. One "statements" call costs six Yahoo requests.
+BUDGETS = {
+    "info": (2.0, 5),
+    "history": (4.0, 10),
+    "download": (1.0, 2),
+    "statements": (1.0, 6),
+    "table": (1.0, 6),
+}
+COSTS = {
+    "statements": 6,
+}
+DEFAULT_BUDGET = (2.0, 5)
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# The rate is halved on every 429 and recovers by this share of the budget on
+# every success, but never drops below MIN_RATE_SHARE of the budget
+RECOVERY_SHARE = 0.05
+MIN_RATE_SHARE = 0.1
+
+
+def is_rate_limited(error):
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    # yfinance fails to parse Yahoo's plain text 429 body as JSON
+    text = f"{error} {getattr(error, 'doc', '')}"
+    return "Too Many Requests" in text or "Rate limited" in text
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _fill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cost=1):
+        # Blocks until `cost` tokens are available, returns the seconds waited
+        cost = min(cost, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._fill(now)
+                if now >= self.paused_until and self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                delay = max(self.paused_until - now, (cost - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def throttle(self, pause):
+        with self._lock:
+            self.rate = max(self.max_rate * MIN_RATE_SHARE, self.rate / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self.tokens = 0
+
+    def recover(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_SHARE)
+
+
+class RateLimiter:
+
+    def __init__(self, budgets=BUDGETS):
+        self.buckets = {endpoint: TokenBucket(*budget) for endpoint, budget in budgets.items()}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, endpoint):
+        with self._lock:
+            if endpoint not in self.buckets:
+                self.buckets[endpoint] = TokenBucket(*DEFAULT_BUDGET)
+            return self.buckets[endpoint]
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            counters = self.counters.setdefault(
+                endpoint, {"calls": 0, "throttled": 0, "rate_limited": 0, "retried": 0, "failed": 0}
+            )
+            counters[name] += 1
+
+    def call(self, endpoint, func, *args, **kwargs):
+        bucket = self._bucket(endpoint)
+        self._count(endpoint, "calls")
+
+        for attempt in range(MAX_RETRIES + 1):
+            if bucket.acquire(COSTS.get(endpoint, 1)) > 0:
+                self._count(endpoint, "throttled")
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e):
+                    self._count(endpoint, "failed")
+                    raise
+                self._count(endpoint, "rate_limited")
+                if attempt == MAX_RETRIES:
+                    self._count(endpoint, "failed")
+                    raise
+                # Exponential backoff with full jitter, shared by the endpoint
+                bucket.throttle(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)))
+                self._count(endpoint, "retried")
+            else:
+                bucket.recover()
+                return result
+
+    def stats(self):
+        with self._lock:
+            stats = {endpoint: dict(counters) for endpoint, counters in self.counters.items()}
+        for endpoint, bucket in self.buckets.items():
+            stats.setdefault(endpoint, {})["rate"] = round(bucket.rate, 3)
+        return stats
+
+
+limiter = RateLimiter()
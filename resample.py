@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from market_hours import EXCHANGES, INTERVALS, exchange_of
+from schema import compact_bars, dense_bars
+
+# Finer intervals a coarser one can be rebuilt from, closest first. Daily bars
+# are never rebuilt from intraday ones: Yahoo's daily close and volume come
+# from the official auction, not from the last intraday bar.
+BASES = {
+    "2m": ["1m"],
+    "5m": ["1m"],
+    "15m": ["5m", "1m"],
+    "30m": ["15m", "5m", "1m"],
+    "60m": ["1h", "30m", "15m", "5m"],
+    "1h": ["60m", "30m", "15m", "5m"],
+    "90m": ["30m", "15m", "5m"],
+    "5d": ["1d"],
+    "1wk": ["1d"],
+    "1mo": ["1d"],
+    "3mo": ["1mo", "1d"],
+}
+
+AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+    "Dividends": "sum",
+    "Capital Gains": "sum",
+}
+
+# Calendar bars start on Mondays, first days of month and of quarter
+PERIODS = {
+    "1wk": "W-SUN",
+    "1mo": "M",
+    "3mo": "Q",
+}
+
+
+def bar_starts(index, interval, ticker):
+    # Start of the coarser bar each timestamp falls in
+    if interval in INTERVALS:
+        # Intraday bars are aligned on the exchange's session open
+        open_ = pd.Timedelta(EXCHANGES[exchange_of(ticker)][1] + ":00")
+        step = INTERVALS[interval]
+        day = index.normalize()
+        return day + open_ + (index - day - open_) // step * step
+    if interval == "5d":
+        # Runs of five sessions
+        return index[np.arange(len(index)) // 5 * 5]
+    starts = index.tz_localize(None).to_period(PERIODS[interval]).start_time
+    return starts.tz_localize(index.tz) if index.tz is not None else starts
+
+
+def resample_bars(df, interval, ticker):
+    if df.empty:
+        return df
+    df = dense_bars(df)
+    starts = bar_starts(df.index, interval, ticker)
+    bars = df.groupby(starts).agg({col: AGGREGATIONS.get(col, "last") for col in df.columns})
+    if "Stock Splits" in df.columns:
+        # Split ratios compound, 0 means no split
+        bars["Stock Splits"] = df["Stock Splits"].replace(0, 1).groupby(starts).prod().replace(1, 0)
+    bars.index.name = df.index.name
+    return compact_bars(bars)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# Compact layout of OHLCV frames kept in the store and the cache: float32
+# prices when that loses nothing visible, the narrowest integer volume and
+# sparse corporate action columns, which are zero on almost every bar.
+PRICES = ["Open", "High", "Low", "Close"]
+ACTIONS = ["Dividends", "Stock Splits", "Capital Gains"]
+
+# Largest rounding error float32 prices may introduce, in quote currency units
+PRICE_TOLERANCE = 5e-4
+
+EPOCH = "Epoch"
+
+
+def _price_dtype(values):
+    values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    error = np.abs(values.astype(np.float32).astype(np.float64) - values)
+    if error.size == 0 or np.isnan(error).all() or np.nanmax(error) <= PRICE_TOLERANCE:
+        return np.float32
+    return np.float64
+
+
+def compact_bars(df):
+    if df.empty:
+        return df
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in PRICES:
+            values = values.astype(_price_dtype(values))
+        elif col == "Volume":
+            values = values.fillna(0)
+            big = len(values) and values.max() > np.iinfo(np.int32).max
+            values = values.astype(np.int64 if big else np.int32)
+        elif col in ACTIONS:
+            values = values.fillna(0).astype(pd.SparseDtype(np.float32, 0))
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def dense_bars(df):
+    # Sparse columns back to plain ones, for code that cannot handle them
+    sparse = [col for col in df.columns if isinstance(df[col].dtype, pd.SparseDtype)]
+    if not sparse:
+        return df
+    return df.astype({col: df[col].dtype.subtype for col in sparse})
+
+
+def to_disk(df):
+    # Parquet has no sparse columns; the index is saved as int64 epoch
+    # nanoseconds, the timezone lives in the sidecar
+    df = dense_bars(df)
+    index = df.index
+    if index.tz is not None:
+        index = index.tz_convert("UTC")
+    df = df.reset_index(drop=True)
+    df.insert(0, EPOCH, index.asi8)
+    return df
+
+
+def from_disk(df, tz, name="Date"):
+    if EPOCH not in df.columns:
+        # Written before the compact layout
+        return compact_bars(df)
+    index = pd.to_datetime(df[EPOCH].to_numpy(), utc=True)
+    index = index.tz_convert(tz) if tz else index.tz_localize(None)
+    df = df.drop(columns=[EPOCH])
+    df.index = index.rename(name)
+    return compact_bars(df)
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locks, replicas may fetch twice
+    fcntl = None
+
+# Second cache tier on local disk, shared by every app process on the host.
+# Entries are frozen values (Arrow IPC for frames, pickles otherwise) in an
+# SQLite database in WAL mode; file locks make sure only one process computes
+# a missing entry while the others wait for it. Set CACHE_DB to an empty string
+# to turn it off.
+CACHE_DB = os.environ.get("CACHE_DB", os.path.join("data", "cache.sqlite"))
+
+# Entries older than this are deleted, whatever their key
+MAX_AGE = 24 * 3600
+
+# Seconds between checks for invalidations made by other processes
+SYNC_INTERVAL = 1.0
+
+# Keys are hashed onto a fixed set of lock files
+LOCK_STRIPES = 256
+
+# Writes between two deletions of expired entries; keys carry the expiry
+# instant, so a long-running process keeps adding new ones
+PRUNE_EVERY = 200
+
+# Seconds between VACUUMs giving the pages of deleted entries back to the disk
+VACUUM_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    kind TEXT,
+    ticker TEXT,
+    created REAL,
+    data BLOB
+);
+CREATE INDEX IF NOT EXISTS entries_ticker ON entries (ticker);
+CREATE TABLE IF NOT EXISTS invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tickers TEXT,
+    kind TEXT,
+    at REAL
+);
+"""
+
+
+class SharedStore:
+
+    def __init__(self, path, max_age=MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.lock_dir = path + ".locks"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        self._vacuumed = time.time()
+        self._guard = threading.Lock()
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+        self.prune()
+
+    def _connect(self):
+        # One connection per thread, sqlite3 connections are not shareable
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key, max_age=None):
+        max_age = self.max_age if max_age is None else max_age
+        try:
+            row = self._connect().execute(
+                "SELECT data FROM entries WHERE key = ? AND created >= ?",
+                (key, time.time() - max_age),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading shared cache: {e}")
+            return None
+        return None if row is None else row[0]
+
+    def put(self, key, kind, ticker, data):
+        try:
+            with self._connect() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, ticker, time.time(), data),
+                )
+        except sqlite3.Error as e:
+            print(f"Error writing shared cache: {e}")
+        with self._guard:
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        # Deletes expired entries and invalidations, and VACUUMs now and then
+        cutoff = time.time() - self.max_age
+        try:
+            with self._connect() as db:
+                db.execute("DELETE FROM entries WHERE created < ?", (cutoff,))
+                db.execute("DELETE FROM invalidations WHERE at < ?", (cutoff,))
+            with self._guard:
+                due = time.time() - self._vacuumed >= VACUUM_INTERVAL
+                if due:
+                    self._vacuumed = time.time()
+            if due:
+                db = self._connect()
+                db.execute("VACUUM")
+                # In WAL mode the file only shrinks once the log is written back
+                db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            print(f"Error pruning shared cache: {e}")
+
+    def invalidate(self, tickers=None, kind=None):
+        # Deletes the entries and records the invalidation for the other
+        # processes' in-memory tiers
+        query = "DELETE FROM entries WHERE 1"
+        params = []
+        if tickers is not None:
+            query += f" AND ticker IN ({', '.join('?' * len(tickers))})"
+            params += list(tickers)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        try:
+            with self._connect() as db:
+                db.execute(query, params)
+                db.execute(
+                    "INSERT INTO invalidations (tickers, kind, at) VALUES (?, ?, ?)",
+                    (None if tickers is None else json.dumps(sorted(tickers)), kind, time.time()),
+                )
+        except sqlite3.Error as e:
+            print(f"Error invalidating shared cache: {e}")
+
+    def stats(self):
+        try:
+            count, size = self._connect().execute("SELECT count(*), sum(length(data)) FROM entries").fetchone()
+        except sqlite3.Error:
+            return {}
+        return {"shared_entries": count, "shared_bytes": size or 0}
+
+    def invalidations(self, since):
+        # [(id, tickers, kind)] recorded after the given id
+        try:
+            rows = self._connect().execute(
+                "SELECT id, tickers, kind FROM invalidations WHERE id > ? ORDER BY id", (since,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error reading shared cache: {e}")
+            return []
+        return [(id_, None if tickers is None else set(json.loads(tickers)), kind) for id_, tickers, kind in rows]
+
+    def last_invalidation(self):
+        try:
+            row = self._connect().execute("SELECT max(id) FROM invalidations").fetchone()
+        except sqlite3.Error:
+            return 0
+        return row[0] or 0
+
+    @contextmanager
+    def lock(self, key):
+        # Exclusive across processes, and across threads too since each call
+        # opens the stripe file anew; the caller must not already hold one
+        if fcntl is None:
+            yield
+            return
+        stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % LOCK_STRIPES
+        with open(os.path.join(self.lock_dir, str(stripe)), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+_store = None
+_store_guard = threading.Lock()
+
+
+def shared_store():
+    # The process's SharedStore, or None when CACHE_DB is empty
+    global _store
+    with _store_guard:
+        if _store is None and CACHE_DB:
+            _store = SharedStore(CACHE_DB)
+        return _store
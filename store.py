@@ -0,0 +1,334 @@
+import os
+import json
+import time
+import threading
+
+import pandas as pd
+
+from market_hours import next_expiry, period_start, slice_period
+from providers import get_provider
+from resample import BASES, resample_bars
+from schema import compact_bars, to_disk, from_disk
+
+# On-disk OHLCV store: one Parquet file per (ticker, interval) plus a small JSON
+# sidecar recording how far back the stored bars are known to be complete.
+STORE_DIR = os.environ.get("HISTORY_STORE_DIR", os.path.join("data", "history"))
+
+# How far back Yahoo serves intraday bars, in days
+INTRADAY_LIMITS = {
+    "1m": 7,
+    "2m": 60,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "60m": 730,
+    "90m": 60,
+    "1h": 730,
+}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(ticker, interval):
+    with _locks_guard:
+        return _locks.setdefault((ticker, interval), threading.Lock())
+
+
+def _paths(ticker, interval):
+    name = f"{ticker}_{interval}".replace(os.sep, "_")
+    base = os.path.join(STORE_DIR, name)
+    return base + ".parquet", base + ".json"
+
+
+def read_store(ticker, interval):
+    data_path, meta_path = _paths(ticker, interval)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, {}
+    try:
+        df = pd.read_parquet(data_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    tz = meta.get("tz")
+    return from_disk(df, None if tz == "None" else tz, meta.get("index") or "Date"), meta
+
+
+def write_store(ticker, interval, df, meta):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    data_path, meta_path = _paths(ticker, interval)
+
+    meta["index"] = df.index.name
+    # Write to temporary files first so readers never see a half written store
+    to_disk(df).to_parquet(data_path + ".tmp", index=False)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def in_timezone(df, tz):
+    # Bars with their index in the given timezone; naive timestamps are taken
+    # to be in it already
+    if df.empty or not isinstance(df.index, pd.DatetimeIndex):
+        return df
+    if df.index.tz is None:
+        return df if tz is None else df.set_axis(df.index.tz_localize(tz))
+    if tz is None:
+        return df.set_axis(df.index.tz_localize(None))
+    return df.set_axis(df.index.tz_convert(tz))
+
+
+def merge_bars(old, new):
+    if old is None or old.empty:
+        return new
+    if new.empty:
+        return old
+    # Bars downloaded in bulk may be in UTC or naive, the result keeps old's timezone
+    new = in_timezone(new, old.index.tz)
+    df = pd.concat([old, new])
+    # Newer rows win: the last stored bar may have been a partial one
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index()
+
+
+def _download(ticker, interval, **kwargs):
+    return get_provider().history(ticker, interval=interval, **kwargs)
+
+
+def _adjusted_since(old, new):
+    # Yahoo back-adjusts every bar for splits and dividends, so a completed bar
+    # fetched again with a different close means the stored series is stale.
+    new = in_timezone(new, old.index.tz)
+    common = old.index.intersection(new.index)
+    if common.empty:
+        return False
+    ts = common[0]
+    before, after = old.at[ts, "Close"], new.at[ts, "Close"]
+    return abs(after - before) > 1e-6 * abs(before)
+
+
+def _download_period(ticker, period, interval):
+    if isinstance(period, pd.Timestamp):
+        df = _download(ticker, interval, start=period)
+    else:
+        df = _download(ticker, interval, period=period)
+    return df, _period_meta(df, period)
+
+
+def _period_meta(df, period):
+    meta = {"max": period == "max"}
+    if not df.empty and period != "max":
+        start = period_start(period, pd.Timestamp.now(tz=df.index.tz))
+        meta["covered_from"] = min(start, df.index[0]).isoformat()
+    return meta
+
+
+def _head_missing(meta, period, now):
+    if meta.get("max"):
+        return False
+    if period == "max":
+        return True
+    covered = meta.get("covered_from")
+    return covered is None or period_start(period, now) < pd.Timestamp(covered)
+
+
+def _is_fresh(meta, period, expires):
+    # Already fetched in the current expiry window and long enough for the period
+    if expires is None or meta.get("expires") != expires or not meta.get("tz"):
+        return False
+    return not _head_missing(meta, period, pd.Timestamp.now(tz=meta["tz"]))
+
+
+def _tail_start(df):
+    return df.index[-2] if len(df) > 1 else df.index[-1]
+
+
+def _too_old(df, interval):
+    # Stored bars are older than anything Yahoo still serves for the interval
+    limit = INTRADAY_LIMITS.get(interval)
+    now = pd.Timestamp.now(tz=df.index.tz)
+    return bool(limit) and _tail_start(df) < now - pd.Timedelta(days=limit)
+
+
+def _save(ticker, interval, df, meta, expires):
+    meta["tz"] = str(df.index.tz)
+    meta["expires"] = expires
+    meta["fetched_at"] = time.time()
+    write_store(ticker, interval, df, meta)
+
+
+def _fresh_base(ticker, period, interval):
+    # A finer stored series, fresh and long enough, the interval can be built from
+    for base in BASES.get(interval, []):
+        if _is_fresh(read_meta(ticker, base), period, next_expiry(ticker, base).timestamp()):
+            return base
+    return None
+
+
+def _derive(ticker, period, interval):
+    base = _fresh_base(ticker, period, interval)
+    if base is None:
+        return None
+    with _lock(ticker, base):
+        df, meta = read_store(ticker, base)
+    if df is None or df.empty:
+        return None
+    return resample_bars(slice_period(df, period), interval, ticker)
+
+
+def load_history(ticker, period="3mo", interval="1d", expires=None):
+    # `period` is a Yahoo period or the Timestamp of the first bar wanted
+    with _lock(ticker, interval):
+        df, meta = read_store(ticker, interval)
+
+        if df is not None and not df.empty and _is_fresh(meta, period, expires):
+            return slice_period(df, period)
+
+        # Switching to a coarser interval needs no request when finer bars are at hand
+        derived = _derive(ticker, period, interval)
+        if derived is not None:
+            return derived
+
+        if df is None or df.empty:
+            df, meta = _download_period(ticker, period, interval)
+            if df.empty:
+                return df
+            df = compact_bars(df)
+        else:
+            if _too_old(df, interval):
+                df, meta = _download_period(ticker, period, interval)
+            else:
+                # Tail: everything since the last complete stored bar
+                new = _download(ticker, interval, start=_tail_start(df))
+                if _adjusted_since(df, new):
+                    df, meta = _download_period(ticker, period, interval)
+                else:
+                    df = merge_bars(df, new)
+
+            # Head: bars before the first stored one, if the period reaches further
+            now = pd.Timestamp.now(tz=df.index.tz)
+            if not df.empty and _head_missing(meta, period, now):
+                if period == "max":
+                    df = merge_bars(_download(ticker, interval, period="max"), df)
+                    meta["max"] = True
+                else:
+                    start = period_start(period, now)
+                    head = _download(ticker, interval, start=start, end=df.index[0])
+                    df = merge_bars(head, df)
+                    meta["covered_from"] = start.isoformat()
+            df = compact_bars(df)
+
+        _save(ticker, interval, df, meta, expires)
+
+        return slice_period(df, period)
+
+
+def _download_many(tickers, interval, tzs, **kwargs):
+    data = get_provider().download(
+        tickers,
+        interval=interval,
+        group_by="ticker",
+        auto_adjust=True,
+        actions=True,
+        ignore_tz=False,
+        progress=False,
+        **kwargs
+    )
+    if data.empty:
+        return {}
+    if isinstance(data.columns, pd.MultiIndex):
+        frames = {ticker: data[ticker] for ticker in tickers if ticker in data.columns.get_level_values(0)}
+    else:
+        frames = {tickers[0]: data}
+
+    result = {}
+    for ticker, df in frames.items():
+        df = df.dropna(how="all", subset=["Open", "High", "Low", "Close"])
+        # Bars of tickers on different exchanges come back on a shared UTC
+        # index; without the exchange's timezone merge_bars uses the stored one
+        tz = tzs.get(ticker)
+        if tz:
+            df = in_timezone(df, tz)
+        df.columns.name = None
+        result[ticker] = df
+    return result
+
+
+def load_history_batch(tickers, period="3mo", interval="1d", expires=None, tzs=None):
+    # Brings every ticker's store up to date with at most two bulk requests:
+    # one for tickers that need the whole period, one for tail-only deltas.
+    # Expiry instants and timezones are given per ticker.
+    expires = expires or {}
+    tzs = tzs or {}
+    stored = {}
+    full, tail = [], []
+
+    for ticker in tickers:
+        meta = read_meta(ticker, interval)
+        if _is_fresh(meta, period, expires.get(ticker)) or _fresh_base(ticker, period, interval):
+            continue
+        df, meta = read_store(ticker, interval)
+        stored[ticker] = (df, meta)
+        if df is None or df.empty or _too_old(df, interval):
+            full.append(ticker)
+        elif _head_missing(meta, period, pd.Timestamp.now(tz=df.index.tz)):
+            full.append(ticker)
+        else:
+            tail.append(ticker)
+
+    updates = {}
+    if full:
+        for ticker, new in _download_many(full, interval, tzs, period=period).items():
+            df, meta = stored[ticker]
+            new_meta = _period_meta(new, period)
+            if df is None or df.empty or _too_old(df, interval) or _adjusted_since(df, new):
+                updates[ticker] = (new, new_meta)
+            else:
+                meta["max"] = meta.get("max") or new_meta["max"]
+                if "covered_from" in new_meta:
+                    meta["covered_from"] = new_meta["covered_from"]
+                updates[ticker] = (merge_bars(df, new), meta)
+    if tail:
+        start = min(_tail_start(stored[ticker][0]).tz_convert("UTC") for ticker in tail)
+        for ticker, new in _download_many(tail, interval, tzs, start=start).items():
+            df, meta = stored[ticker]
+            if _adjusted_since(df, new):
+                updates[ticker] = _download_period(ticker, period, interval)
+            else:
+                updates[ticker] = (merge_bars(df, new), meta)
+
+    for ticker, (df, meta) in updates.items():
+        if not df.empty:
+            with _lock(ticker, interval):
+                _save(ticker, interval, df, meta, expires.get(ticker))
+
+
+def read_meta(ticker, interval):
+    meta_path = _paths(ticker, interval)[1]
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def expire_store(tickers=None):
+    # Forces the next load of the given tickers' stored series (all when None)
+    # to go upstream again
+    if not os.path.isdir(STORE_DIR):
+        return
+    names = None if tickers is None else {ticker.replace(os.sep, "_") for ticker in tickers}
+    for name in os.listdir(STORE_DIR):
+        if name.endswith(".json") and (names is None or name.rsplit("_", 1)[0] in names):
+            path = os.path.join(STORE_DIR, name)
+            try:
+                with open(path) as f:
+                    meta = json.load(f)
+                meta["expires"] = None
+                with open(path + ".tmp", "w") as f:
+                    json.dump(meta, f)
+                os.replace(path + ".tmp", path)
+            except (OSError, ValueError):
+                continue
@@ -0,0 +1,183 @@
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Local symbol index: a sorted, fixed-width NumPy table memory-mapped from disk,
+# so validating a ticker or completing a prefix is a binary search.
+SYMBOLS_PATH = os.environ.get("SYMBOLS_INDEX", os.path.join("data", "symbols.npy"))
+
+DTYPE = np.dtype([
+    ("symbol", "S24"),
+    ("exchange", "S8"),
+    ("quote_type", "S16"),
+    ("name", "S48"),
+])
+
+# Column names understood when building the index from a bulk listing
+COLUMNS = {
+    "symbol": ["symbol", "Symbol", "ACT Symbol", "NASDAQ Symbol"],
+    "exchange": ["exchange", "Exchange", "Listing Exchange"],
+    "quote_type": ["quoteType", "quote_type", "ETF"],
+    "name": ["name", "shortName", "Security Name", "Company Name"],
+}
+
+# Yahoo codes for the exchanges of the NASDAQ Trader symbol directory
+NASDAQ_EXCHANGES = {"A": "ASE", "N": "NYQ", "P": "PCX", "Z": "BTS", "V": "IEX", "": "NMS"}
+
+NASDAQ_SOURCES = [
+    "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt",
+    "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
+]
+
+# Characters a Yahoo symbol can be made of
+SYMBOL_PATTERN = r"[\^A-Za-z0-9.=\-]+"
+
+# Symbols of indexed markets that exchange listings leave out, checked with
+# Yahoo instead: mutual funds (five letters ending in X) and OTC foreign
+# shares and ADRs (ending in F or Y)
+UNLISTED_PATTERN = r"[A-Z]{4}[XFY]"
+
+_index = None
+_markets = set()
+_mtime = None
+_guard = threading.Lock()
+
+
+def market_of(symbol):
+    # Part of a Yahoo symbol that identifies its market: ".DE", "=X", "^", "-USD"...
+    if symbol.startswith("^"):
+        return "^"
+    for sep in ("=", "."):
+        if sep in symbol:
+            return sep + symbol.rsplit(sep, 1)[1]
+    if re.fullmatch(r"[A-Z0-9]+-[A-Z]{3}", symbol):
+        return "-" + symbol.rsplit("-", 1)[1]
+    return ""
+
+
+def _column(df, key):
+    for name in COLUMNS[key]:
+        if name in df.columns:
+            return df[name].fillna("").astype(str)
+    return pd.Series("", index=df.index)
+
+
+def read_listing(source):
+    # Reads a comma or pipe separated listing (path or URL) into index columns
+    df = pd.read_csv(source, sep="|", dtype=str, keep_default_na=False)
+    if len(df.columns) == 1:
+        df = pd.read_csv(source, dtype=str, keep_default_na=False)
+    table = pd.DataFrame({key: _column(df, key) for key in COLUMNS})
+
+    if "ETF" in df.columns:
+        table["quote_type"] = np.where(df["ETF"] == "Y", "ETF", "EQUITY")
+    if "NASDAQ Symbol" in df.columns or "Market Category" in df.columns:
+        # NASDAQ Trader uses "." for share classes where Yahoo uses "-"
+        table["symbol"] = table["symbol"].str.replace(".", "-", regex=False)
+        table["exchange"] = table["exchange"].map(NASDAQ_EXCHANGES).fillna(table["exchange"])
+
+    # Footer lines such as "File Creation Time: ..." are not symbols
+    table = table[table["symbol"].str.fullmatch(SYMBOL_PATTERN)]
+    return table
+
+
+def _fit(text, width):
+    # UTF-8 bytes of the text cut to the field width on a character boundary
+    return text.encode("utf-8")[:width].decode("utf-8", errors="ignore").encode("utf-8")
+
+
+def _text(value):
+    # Indexes written before _fit may end in a split character
+    return value.decode("utf-8", errors="ignore")
+
+
+def build_symbol_index(sources, path=None):
+    path = path or SYMBOLS_PATH
+    table = pd.concat([read_listing(source) for source in sources], ignore_index=True)
+    table["symbol"] = table["symbol"].str.upper()
+    table = table.drop_duplicates("symbol")
+
+    data = np.empty(len(table), dtype=DTYPE)
+    for key in COLUMNS:
+        data[key] = table[key].map(lambda text: _fit(text, DTYPE[key].itemsize)).to_numpy()
+
+    # Entries are sorted bytewise, which is the order np.searchsorted relies on
+    data.sort(order="symbol")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, data)
+    os.replace(path + ".tmp", path)
+    return len(data)
+
+
+def load_index(path=None):
+    # Memory-maps the index, reloading it when the file is refreshed
+    global _index, _markets, _mtime
+    path = path or SYMBOLS_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _guard:
+        if _index is None or mtime != _mtime:
+            _index = np.load(path, mmap_mode="r")
+            _markets = {market_of(symbol.decode()) for symbol in _index["symbol"]}
+            _mtime = mtime
+        return _index
+
+
+def _position(index, symbol):
+    key = symbol.upper().encode()
+    i = np.searchsorted(index["symbol"], key)
+    if i < len(index) and index["symbol"][i] == key:
+        return i
+    return None
+
+
+def lookup_symbol(symbol):
+    index = load_index()
+    if index is None:
+        return None
+    i = _position(index, symbol)
+    if i is None:
+        return None
+    row = index[i]
+    return {key: _text(row[key]) for key in COLUMNS}
+
+
+def is_known_symbol(symbol):
+    # True/False when the index settles it, None when only Yahoo can tell: no
+    # index, a market it does not cover or a kind of symbol listings omit
+    symbol = symbol.upper()
+    if not re.fullmatch(SYMBOL_PATTERN, symbol):
+        return False
+    index = load_index()
+    if index is None:
+        return None
+    if _position(index, symbol) is not None:
+        return True
+    if market_of(symbol) not in _markets or re.fullmatch(UNLISTED_PATTERN, symbol):
+        return None
+    return False
+
+
+def search_symbols(prefix, limit=10):
+    index = load_index()
+    if index is None or not prefix:
+        return []
+    key = prefix.upper().encode()
+    start = np.searchsorted(index["symbol"], key, side="left")
+    end = np.searchsorted(index["symbol"], key + b"\xff", side="left")
+    rows = index[start:min(end, start + limit)]
+    return [(_text(row["symbol"]), _text(row["name"])) for row in rows]
+
+
+if __name__ == "__main__":
+    # python symbols.py [listing ...] refreshes the index, from NASDAQ Trader by default
+    count = build_symbol_index(sys.argv[1:] or NASDAQ_SOURCES)
+    print(f"Indexed {count} symbols into {SYMBOLS_PATH}")
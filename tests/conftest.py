@@ -0,0 +1,4 @@
+import os
+
+# Tests never touch the on-disk stores under data/
+os.environ["CACHE_DB"] = ""
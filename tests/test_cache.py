@@ -0,0 +1,141 @@
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_cache
+from cache import DataCache, FrozenFrame, freeze, thaw, sizeof
+from schema import dense_bars
+from shared_cache import SharedStore
+
+
+def test_nested_miss_does_not_deadlock(tmp_path, monkeypatch):
+    # A loader holding the only stripe calls a loader whose key lock another
+    # thread holds while it waits for that stripe
+    monkeypatch.setattr(shared_cache, "LOCK_STRIPES", 1)
+    cache = DataCache(shared=SharedStore(str(tmp_path / "cache.sqlite")))
+    outer_started = threading.Event()
+    inner_waiting = threading.Event()
+    results = {}
+
+    def inner():
+        return 1
+
+    def outer():
+        outer_started.set()
+        inner_waiting.wait(5)
+        # Let the other thread take the inner key lock and block on the stripe
+        time.sleep(0.2)
+        return cache.get_or_compute(("inner", ()), "history", "T", inner) + 1
+
+    def run_outer():
+        results["outer"] = cache.get_or_compute(("outer", ()), "indicators", "T", outer)
+
+    def run_inner():
+        outer_started.wait(5)
+        inner_waiting.set()
+        results["inner"] = cache.get_or_compute(("inner", ()), "history", "T", inner)
+
+    threads = [threading.Thread(target=run_outer, daemon=True), threading.Thread(target=run_inner, daemon=True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert results == {"outer": 2, "inner": 1}
+
+
+def test_lru_eviction_within_byte_budget():
+    value = b"x" * 1000
+    size = sizeof(freeze(value))
+    cache = DataCache(max_bytes=3 * size)
+    load = lambda key: cache.get_or_compute((key, ()), "info", key, lambda: value)
+
+    for key in "ABC":
+        load(key)
+    # A hit makes A the most recently used, so D evicts B
+    load("A")
+    load("D")
+
+    assert sorted(entry["ticker"] for entry in cache.entries()) == ["A", "C", "D"]
+    assert cache.bytes == 3 * size
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 1)
+    assert stats["hit_rate"] == 0.2
+
+    load("B")
+    assert sorted(entry["ticker"] for entry in cache.entries()) == ["A", "B", "D"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_values_over_the_budget_are_not_cached():
+    cache = DataCache(max_bytes=100)
+    calls = []
+    load = lambda: cache.get_or_compute(("big", ()), "info", "BIG", lambda: calls.append(1) or b"x" * 1000)
+
+    assert load() == b"x" * 1000
+    assert load() == b"x" * 1000
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0 and cache.bytes == 0
+
+
+def test_invalidate_releases_bytes():
+    cache = DataCache()
+    for ticker, kind in (("A", "info"), ("A", "history"), ("B", "info")):
+        cache.get_or_compute((kind, ticker), kind, ticker, lambda: b"x" * 100)
+
+    assert cache.invalidate({"A"}, "info") == 1
+    assert cache.invalidate(None, "info") == 1
+    assert cache.bytes == sizeof(freeze(b"x" * 100))
+
+
+def bars():
+    index = pd.date_range("2024-01-02", periods=50, tz="America/New_York", name="Date")
+    return pd.DataFrame({
+        "Close": np.linspace(100, 150, 50, dtype=np.float32),
+        "Volume": np.arange(50, dtype=np.int32),
+        "Stock Splits": pd.arrays.SparseArray(np.zeros(50, dtype=np.float32), fill_value=0),
+    }, index=index)
+
+
+def assert_read_only_view(frozen, df):
+    thawed = thaw(frozen)
+    # Sparse action columns are frozen dense
+    pd.testing.assert_frame_equal(thawed, dense_bars(df))
+    assert list(thawed.dtypes) == [np.float32, np.int32, np.float32]
+    # Every hit reads the same Arrow buffers and cannot write into them
+    assert np.shares_memory(thawed["Close"].to_numpy(), thaw(frozen)["Close"].to_numpy())
+    with pytest.raises(ValueError):
+        thawed.iloc[0, 0] = 0
+    with pytest.raises(ValueError):
+        thawed["Close"].to_numpy()[0] = 0
+    # New columns only belong to the caller's frame
+    thawed["SMA_20"] = 1.0
+    assert list(thaw(frozen).columns) == ["Close", "Volume", "Stock Splits"]
+
+
+def test_frozen_frame_round_trip():
+    df = bars()
+    frozen = freeze(df)
+    assert isinstance(frozen, FrozenFrame)
+    assert_read_only_view(frozen, df)
+
+    # The shared tier stores frames pickled as Arrow IPC
+    restored = pickle.loads(pickle.dumps(frozen, protocol=pickle.HIGHEST_PROTOCOL))
+    assert restored.nbytes == frozen.nbytes
+    assert_read_only_view(restored, df)
+
+
+def test_freeze_falls_back_to_pickle():
+    df = bars().assign(Name="MSFT")
+    frozen = freeze({"bars": bars(), "names": df, "empty": bars().iloc[:0]})
+    assert isinstance(frozen["bars"], FrozenFrame)
+    assert isinstance(frozen["names"], bytes) and isinstance(frozen["empty"], bytes)
+    thawed = thaw(frozen)
+    pd.testing.assert_frame_equal(thawed["names"], df)
+    thawed["names"].iloc[0, 0] = 0
+    assert thaw(frozen)["names"].iloc[0, 0] == df.iloc[0, 0]
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import compute_indicators, compute_panel, IndicatorStream
+
+BUILT_IN = ["SMA_20", "SMA_200", "SMA_7", "EMA_20", "EMA_200", "EMA_33", "ATR", "MACD", "RSI"]
+
+
+def pandas_indicators(df, indicators):
+    # The pandas code the market pages used before the engine
+    out = {}
+    close = df["Close"]
+    for indicator in indicators:
+        if "SMA" in indicator:
+            out[indicator] = close.rolling(window=int(indicator.split("_")[1]), min_periods=1).mean()
+        if "EMA" in indicator:
+            out[indicator] = close.ewm(span=int(indicator.split("_")[1]), adjust=False, min_periods=1).mean()
+    if "ATR" in indicators:
+        previous = close.shift(1)
+        tr = pd.concat([df["High"] - df["Low"], abs(df["High"] - previous), abs(df["Low"] - previous)], axis=1).max(axis=1)
+        out["ATR"] = tr.rolling(window=14, min_periods=1).mean()
+    if "MACD" in indicators:
+        macd = close.ewm(span=12, adjust=False, min_periods=1).mean() - close.ewm(span=26, adjust=False, min_periods=1).mean()
+        out["MACD"] = macd
+        out["Signal"] = macd.ewm(span=9, adjust=False, min_periods=1).mean()
+        out["MACD_Hist"] = macd - out["Signal"]
+    if "RSI" in indicators:
+        delta = close.ffill().pct_change(periods=1, fill_method=None) * 100
+        gain = delta.where(delta > 0, 0).rolling(window=14, min_periods=1).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
+        out["RSI"] = 100 - 100 / (1 + gain / loss)
+    return out
+
+
+def random_bars(n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.005, n)) * close
+    index = pd.date_range("2020-01-01", periods=n, freq="D")
+    return pd.DataFrame({"High": close + spread, "Low": close - spread, "Close": close}, index=index)
+
+
+def with_gaps(df):
+    df = df.copy()
+    df.iloc[:3] = np.nan
+    df.iloc[100:105] = np.nan
+    df.iloc[400, df.columns.get_loc("Close")] = np.nan
+    return df
+
+
+def assert_matches(got, expected):
+    assert sorted(got) == sorted(expected)
+    for name, values in got.items():
+        np.testing.assert_allclose(values, expected[name].to_numpy(), rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+def test_matches_pandas_without_gaps():
+    df = random_bars()
+    assert_matches(compute_indicators(df, BUILT_IN), pandas_indicators(df, BUILT_IN))
+
+
+def test_matches_pandas_with_gaps():
+    df = with_gaps(random_bars())
+    got = compute_indicators(df, BUILT_IN)
+    # Rolling means skip missing values like pandas does
+    expected = pandas_indicators(df, BUILT_IN)
+    assert_matches({k: v for k, v in got.items() if k.startswith(("SMA", "ATR", "RSI"))},
+                   {k: v for k, v in expected.items() if k.startswith(("SMA", "ATR", "RSI"))})
+    # The EMA recursion runs over the previous close through a gap, where
+    # ewm(adjust=False) would reweight the next close by the gap's length
+    filled = pandas_indicators(df.assign(Close=df["Close"].ffill()), BUILT_IN)
+    assert_matches({k: v for k, v in got.items() if k.startswith(("EMA", "MACD", "Signal"))},
+                   {k: v for k, v in filled.items() if k.startswith(("EMA", "MACD", "Signal"))})
+
+
+@pytest.mark.parametrize("indicator", BUILT_IN)
+def test_each_indicator_alone(indicator):
+    df = with_gaps(random_bars())
+    alone = compute_indicators(df, [indicator])
+    together = compute_indicators(df, BUILT_IN)
+    for name, values in alone.items():
+        np.testing.assert_array_equal(values, together[name])
+
+
+def assert_bitwise(got, expected):
+    assert sorted(got) == sorted(expected)
+    for name, values in got.items():
+        assert values.tobytes() == expected[name].tobytes(), name
+
+
+@pytest.mark.parametrize("chunks", [1, 7, "random"])
+def test_stream_matches_batch(chunks):
+    df = with_gaps(random_bars(600))
+    stream = IndicatorStream(BUILT_IN)
+    rng = np.random.default_rng(1)
+    n = 0
+    while n < len(df):
+        n = min(len(df), n + (int(rng.integers(1, 40)) if chunks == "random" else chunks))
+        forming = df.iloc[:n].copy()
+        # The last bar is still forming: first seen with another close
+        forming.iloc[-1, forming.columns.get_loc("Close")] *= 1.001
+        assert_bitwise(stream.update(forming), compute_indicators(forming, BUILT_IN))
+        assert_bitwise(stream.update(df.iloc[:n]), compute_indicators(df.iloc[:n], BUILT_IN))
+
+
+def test_stream_restarts_on_changed_history():
+    df = random_bars(300)
+    stream = IndicatorStream(BUILT_IN)
+    stream.update(df.iloc[:200])
+    # Back-adjusted closes, as after a split
+    adjusted = df.assign(Close=df["Close"] / 2)
+    assert_bitwise(stream.update(adjusted.iloc[:250]), compute_indicators(adjusted.iloc[:250], BUILT_IN))
+
+
+def test_panel_matches_per_ticker():
+    # Frames of different lengths and price levels, one with gaps
+    frames = [random_bars(1500, 0), random_bars(900, 1) / 20, with_gaps(random_bars(1200, 2)) * 3]
+    for frame, got in zip(frames, compute_panel(frames, BUILT_IN)):
+        expected = compute_indicators(frame, BUILT_IN)
+        assert sorted(got) == sorted(expected)
+        for name, values in got.items():
+            np.testing.assert_allclose(values, expected[name], rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+def test_comparison_chart_scales_price_indicators():
+    from functions import plot_line_multiple
+
+    frames = []
+    for ticker, scale in (("AAA", 1), ("BBB", 50)):
+        df = random_bars(300) * scale
+        df = df.assign(**compute_indicators(df, ["SMA_20", "ATR", "RSI"]), Ticker=ticker)
+        frames.append(df.assign(Pct_change=(df["Close"] - df["Close"].iloc[0]) / df["Close"].iloc[0]))
+    fig = plot_line_multiple(pd.concat(frames))
+    traces = {trace.name: np.asarray(trace.y, dtype=float) for trace in fig.data}
+    # The same bars at 50 times the price draw the same lines, RSI included
+    for name in ("SMA_20", "ATR", "RSI"):
+        np.testing.assert_allclose(traces[f"AAA {name}"], traces[f"BBB {name}"], rtol=1e-9, err_msg=name)
+    assert np.nanmax(traces["AAA RSI"]) > 1
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+import providers
+import store
+from functions import fetch_history, fetch_history_lookback
+from market_hours import period_start
+
+
+class FakeProvider:
+    # Ten years of daily bars, recording the requests made for them
+
+    def __init__(self):
+        index = pd.bdate_range(end=pd.Timestamp.now(tz="America/New_York").normalize() - pd.Timedelta(days=1),
+                               periods=2600, name="Date")
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(index))))
+        self.bars = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000,
+                                  "Dividends": 0.0, "Stock Splits": 0.0}, index=index)
+        self.requests = []
+
+    def history(self, ticker, interval="1d", period=None, start=None, end=None, **kwargs):
+        df = self.bars
+        if period is not None and period != "max":
+            df = df[df.index >= period_start(period, pd.Timestamp.now(tz=df.index.tz))]
+        if start is not None:
+            df = df[df.index >= start]
+        if end is not None:
+            df = df[df.index < end]
+        self.requests.append((period, start, len(df)))
+        return df.copy()
+
+    def info(self, ticker):
+        return {"quoteType": "EQUITY", "exchangeTimezoneName": "America/New_York"}
+
+
+def test_lookback_downloads_only_the_prefix(tmp_path, monkeypatch):
+    provider = FakeProvider()
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(providers, "_provider", provider)
+
+    shown = fetch_history("LOOK", period="3mo", interval="1d")
+    provider.requests.clear()
+    hist, extra = fetch_history_lookback("LOOK", "3mo", "1d", 199)
+
+    assert extra == 199
+    assert hist.index[extra:].equals(shown.index)
+    assert hist.index[0] == provider.bars.index[provider.bars.index.get_loc(shown.index[0]) - 199]
+    # One head request, well short of the next whole period
+    heads = [request for request in provider.requests if request[2] > 2]
+    assert len(heads) == 1 and heads[0][2] < 260
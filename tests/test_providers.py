@@ -0,0 +1,39 @@
+import logging
+import threading
+
+import pandas as pd
+import pytest
+import yfinance as yf
+
+from providers import YahooProvider, RateLimitedError
+
+RATE_LIMITED = "['MSFT']: HTTPError('429 Client Error: Too Many Requests for url: https://query2.finance.yahoo.com')"
+
+
+def fake_download(message, in_thread=False):
+    def download(tickers, **kwargs):
+        log = lambda: logging.getLogger("yfinance").error(message)
+        if in_thread:
+            thread = threading.Thread(target=log)
+            thread.start()
+            thread.join()
+        else:
+            log()
+        return pd.DataFrame()
+    return download
+
+
+def test_download_raises_when_rate_limited(monkeypatch):
+    monkeypatch.setattr(yf, "download", fake_download(RATE_LIMITED))
+    with pytest.raises(RateLimitedError):
+        YahooProvider().download(["MSFT", "AAPL"], period="5d")
+
+
+def test_download_keeps_other_failures(monkeypatch):
+    monkeypatch.setattr(yf, "download", fake_download("['GONE']: YFTzMissingError('$%ticker%: possibly delisted; no timezone found')"))
+    assert YahooProvider().download(["GONE"], period="5d").empty
+
+
+def test_download_ignores_errors_of_other_threads(monkeypatch):
+    monkeypatch.setattr(yf, "download", fake_download(RATE_LIMITED, in_thread=True))
+    assert YahooProvider().download(["MSFT"], period="5d").empty
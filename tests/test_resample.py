@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from resample import resample_bars
+
+
+def intraday_bars(days, tz="America/New_York", open_="09:30", last="15:55"):
+    # Sessions of 5 minute bars with prices that tell the bars apart
+    index = pd.DatetimeIndex([], tz=tz)
+    for day in days:
+        index = index.append(pd.date_range(f"{day} {open_}", f"{day} {last}", freq="5min", tz=tz))
+    n = len(index)
+    close = 100 + np.arange(n, dtype=float)
+    return pd.DataFrame({
+        "Open": close - 0.25,
+        "High": close + 0.5,
+        "Low": close - 0.5,
+        "Close": close,
+        "Volume": np.arange(1, n + 1) * 10,
+    }, index=index.rename("Datetime"))
+
+
+def expected_bar(df):
+    return (df["Open"].iloc[0], df["High"].max(), df["Low"].min(), df["Close"].iloc[-1], df["Volume"].sum())
+
+
+def actual_bar(bars, start):
+    row = bars.loc[start]
+    return (row["Open"], row["High"], row["Low"], row["Close"], row["Volume"])
+
+
+def test_hourly_bars_stop_at_the_close():
+    df = intraday_bars(["2024-03-07", "2024-03-08"])
+    bars = resample_bars(df, "60m", "MSFT")
+
+    # Hours start at the open, the last one of a session holds half an hour
+    # and no bar takes the next session's first bars
+    assert len(bars) == 14
+    for day in ("2024-03-07", "2024-03-08"):
+        session = df.loc[day]
+        starts = pd.date_range(f"{day} 09:30", periods=7, freq="h", tz="America/New_York")
+        assert bars.loc[day].index.equals(starts.rename("Datetime"))
+        for start in starts:
+            assert actual_bar(bars, start) == expected_bar(session[start:start + pd.Timedelta("55min")])
+    assert bars.loc["2024-03-07 15:30"]["Volume"] == df.loc["2024-03-07 15:30":"2024-03-07 15:55", "Volume"].sum()
+    assert bars["Volume"].sum() == df["Volume"].sum()
+
+
+def test_15m_bars_of_a_market_opening_on_the_hour():
+    df = intraday_bars(["2024-03-07"], tz="Europe/Berlin", open_="09:00", last="17:25")
+    bars = resample_bars(df, "15m", "SAP.DE")
+
+    assert bars.index[0] == pd.Timestamp("2024-03-07 09:00", tz="Europe/Berlin")
+    assert len(bars) == len(df) // 3
+    assert actual_bar(bars, bars.index[1]) == expected_bar(df.iloc[3:6])
+
+
+def test_weekly_and_monthly_bars_from_daily():
+    index = pd.bdate_range("2024-01-25", "2024-02-09", tz="America/New_York", name="Date")
+    close = 50 + np.arange(len(index), dtype=float)
+    df = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                       "Volume": np.full(len(index), 100), "Stock Splits": 0.0}, index=index)
+    df.loc["2024-01-30", "Stock Splits"] = 2.0
+    df.loc["2024-02-01", "Stock Splits"] = 3.0
+
+    weeks = resample_bars(df, "1wk", "MSFT")
+    # Weeks start on Mondays, the first one is partial
+    assert list(weeks.index.strftime("%Y-%m-%d")) == ["2024-01-22", "2024-01-29", "2024-02-05"]
+    assert list(weeks["Volume"]) == [200, 500, 500]
+    assert actual_bar(weeks, weeks.index[1]) == expected_bar(df.loc["2024-01-29":"2024-02-02"])
+    # Splits in one bar compound
+    assert list(weeks["Stock Splits"].astype(float)) == [0, 6, 0]
+
+    months = resample_bars(df, "1mo", "MSFT")
+    assert list(months.index.strftime("%Y-%m-%d")) == ["2024-01-01", "2024-02-01"]
+    assert actual_bar(months, months.index[1]) == expected_bar(df.loc["2024-02"])
+    assert list(months["Stock Splits"].astype(float)) == [2, 3]
+
+
+def test_5d_bars_are_runs_of_sessions():
+    index = pd.bdate_range("2024-01-02", periods=12, tz="America/New_York", name="Date")
+    close = np.arange(12, dtype=float)
+    df = pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                       "Volume": np.ones(12, dtype=int)}, index=index)
+    bars = resample_bars(df, "5d", "MSFT")
+
+    assert list(bars.index) == [index[0], index[5], index[10]]
+    assert list(bars["Volume"]) == [5, 5, 2]
+    assert list(bars["Close"]) == [4, 9, 11]
@@ -0,0 +1,28 @@
+import os
+import time
+
+import shared_cache
+from shared_cache import SharedStore
+
+
+def _disk_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+
+
+def test_put_prunes_expired_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "PRUNE_EVERY", 3)
+    monkeypatch.setattr(shared_cache, "VACUUM_INTERVAL", 0)
+    path = str(tmp_path / "cache.sqlite")
+    store = SharedStore(path, max_age=0.5)
+
+    for i in range(2):
+        store.put(f"old{i}", "history", "T", b"x" * 1_000_000)
+    store.invalidate(["T"], "info")
+    size = _disk_size(path)
+    time.sleep(0.6)
+    # The third write prunes the two expired ones
+    store.put("new", "history", "T", b"y")
+
+    assert store.stats()["shared_entries"] == 1
+    assert store.invalidations(0) == []
+    assert _disk_size(path) < size
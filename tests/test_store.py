@@ -0,0 +1,43 @@
+import pandas as pd
+
+from store import merge_bars, slice_period
+
+
+def _bars(start, periods, freq="D", tz="America/New_York"):
+    index = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    return pd.DataFrame({"Close": range(periods)}, index=index, dtype=float)
+
+
+def test_slice_period_sessions():
+    df = _bars("2024-01-01 09:30", 5 * 78, freq="5min")
+    df = df[df.index.hour < 16]
+    sliced = slice_period(df, "1d")
+    assert sliced.index.normalize().nunique() == 1
+    assert sliced.index[-1] == df.index[-1]
+
+
+def test_slice_period_ytd():
+    now = pd.Timestamp.now(tz="America/New_York")
+    df = _bars(now.normalize() - pd.Timedelta(days=400), 401)
+    sliced = slice_period(df, "ytd")
+    assert sliced.index[0] == now.normalize().replace(month=1, day=1)
+    assert sliced.index[-1] == df.index[-1]
+
+
+def test_slice_period_max():
+    df = _bars("2020-01-01", 10)
+    assert slice_period(df, "max") is df
+
+
+def test_merge_bars_keeps_stored_timezone():
+    stored = _bars("2024-01-02 09:30", 3, freq="h")
+    utc = _bars("2024-01-02 11:30", 3, freq="h").tz_convert("UTC")
+    merged = merge_bars(stored, utc)
+    assert str(merged.index.tz) == "America/New_York"
+    assert len(merged) == 5
+    assert merged.index.is_monotonic_increasing
+
+    naive = _bars("2024-01-02 11:30", 2, freq="h").tz_localize(None)
+    merged = merge_bars(stored, naive)
+    assert str(merged.index.tz) == "America/New_York"
+    assert len(merged) == 4
@@ -0,0 +1,49 @@
+import providers
+import symbols
+from functions import validate_tickers
+
+
+def _index(tmp_path, monkeypatch, rows):
+    listing = tmp_path / "listing.csv"
+    listing.write_text("symbol,exchange,quoteType,name\n" + "".join(f"{row}\n" for row in rows), encoding="utf-8")
+    monkeypatch.setattr(symbols, "SYMBOLS_PATH", str(tmp_path / "symbols.npy"))
+    symbols.build_symbol_index([str(listing)])
+
+
+def test_is_known_symbol(tmp_path, monkeypatch):
+    _index(tmp_path, monkeypatch, ["MSFT,NMS,EQUITY,Microsoft"])
+
+    assert symbols.is_known_symbol("msft") is True
+    # A typo in a market the index covers needs no request
+    assert symbols.is_known_symbol("MSFTT") is False
+    # Funds and other markets are left to Yahoo
+    assert symbols.is_known_symbol("FXAIX") is None
+    assert symbols.is_known_symbol("SAP.DE") is None
+    assert symbols.is_known_symbol("MS FT") is False
+
+
+class InfoProvider:
+
+    def __init__(self):
+        self.calls = []
+
+    def info(self, ticker):
+        self.calls.append(ticker)
+        return {"quoteType": "MUTUALFUND"} if ticker == "FXAIX" else {"trailingPegRatio": None}
+
+
+def test_validate_tickers_only_asks_for_unknown_symbols(tmp_path, monkeypatch):
+    _index(tmp_path, monkeypatch, ["MSFT,NMS,EQUITY,Microsoft"])
+    provider = InfoProvider()
+    monkeypatch.setattr(providers, "_provider", provider)
+
+    assert validate_tickers(["MSFT", "MSFTT", "FXAIX", "ZZZZX"]) == ["MSFT", "FXAIX"]
+    assert sorted(provider.calls) == ["FXAIX", "ZZZZX"]
+
+
+def test_names_are_cut_on_characters(tmp_path, monkeypatch):
+    name = "A" * 47 + "é" + " Holdings"
+    _index(tmp_path, monkeypatch, [f"ABCD,NMS,EQUITY,{name}", "ABCE,NMS,EQUITY,Société Générale"])
+
+    assert symbols.lookup_symbol("ABCD")["name"] == "A" * 47
+    assert symbols.search_symbols("ABC") == [("ABCD", "A" * 47), ("ABCE", "Société Générale")]
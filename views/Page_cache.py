@@ -0,0 +1,74 @@
+from functions import *
+
+st.set_page_config(
+    page_title="Cache", # The page title, shown in the browser tab.
+    page_icon=":material/storage:",
+    layout="wide", # How the page content should be laid out.
+    initial_sidebar_state="auto", # How the sidebar should start out.
+    menu_items={ # Configure the menu that appears on the top-right side of this app.
+        "Get help": "https://github.com/LMAPcoder" # The URL this menu item should point to.
+    }
+)
+
+if not CACHE_ADMIN:
+    st.error("The cache page is disabled, set CACHE_ADMIN to enable it.")
+    st.stop()
+
+# ---- SIDEBAR ----
+with st.sidebar:
+
+    TICKERS = st.text_input(
+        label="Securities:",
+        placeholder="MSFT, QQQ"
+    )
+
+    TICKERS = [item.strip() for item in TICKERS.split(",") if item.strip() != ""]
+
+    TICKERS = remove_duplicates(TICKERS)
+
+    KIND = st.selectbox(
+        label="Data",
+        options=[None] + KINDS,
+        index=0,
+        format_func=lambda kind: "All" if kind is None else kind.capitalize(),
+    )
+
+    button = st.button("Invalidate", key="invalidate", disabled=not TICKERS)
+    if button:
+        REMOVED = refresh_tickers(TICKERS, kind=KIND)
+        st.caption(f"{REMOVED} entries removed")
+
+# ---- MAINPAGE ----
+st.title("Cache")
+
+STATS = cache_stats()
+
+col1, col2, col3, col4 = st.columns(4, gap="small")
+col1.metric(label="Memory (MB)", value=f'{STATS["bytes"] / 2 ** 20:.1f} / {STATS["max_bytes"] / 2 ** 20:.0f}')
+col2.metric(label="Hit rate", value="-" if STATS["hit_rate"] is None else f'{STATS["hit_rate"]:.0%}')
+col3.metric(label="Hits / Misses", value=f'{STATS["hits"]} / {STATS["misses"]}')
+col4.metric(label="Evictions", value=STATS["evictions"])
+
+if "shared_entries" in STATS:
+    st.caption(
+        f'Shared with other app processes: {STATS["shared_entries"]} entries, '
+        f'{STATS["shared_bytes"] / 2 ** 20:.1f} MB, {STATS["shared_hits"]} hits'
+    )
+
+ENTRIES = pd.DataFrame(cache_entries())
+
+if ENTRIES.empty:
+    st.write("The cache is empty")
+else:
+    if TICKERS:
+        ENTRIES = ENTRIES[ENTRIES["ticker"].isin(TICKERS)]
+
+    col1, col2 = st.columns(2, gap="small")
+    col1.metric(label="Entries", value=len(ENTRIES))
+    col2.metric(label="Size (MB)", value=round(ENTRIES["size (KB)"].sum() / 1024, 2))
+
+    st.dataframe(
+        ENTRIES.sort_values(["kind", "ticker", "age (s)"]),
+        hide_index=True,
+        use_container_width=True
+    )
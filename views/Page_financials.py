@@ -43,7 +43,15 @@ with st.sidebar:
         options=["Annual", "Quarterly"]
     )
 
-    TICKERS = [TICKER for TICKER in TICKERS if fetch_info(TICKER) is not None]
+    ENTERED = TICKERS
+
+    TICKERS = validate_tickers(TICKERS)
+
+    for TICKER in ENTERED:
+        if TICKER not in TICKERS:
+            SUGGESTIONS = suggest_tickers(TICKER)
+            if SUGGESTIONS:
+                st.caption(f"{TICKER} not found. Did you mean {', '.join(SUGGESTIONS)}?")
 
     st.markdown("Made with ❤️ by Leonardo")
 
@@ -68,10 +76,12 @@ if len(TICKERS) == 1:
 
     CURRENCY = info["financialCurrency"]
 
-    bs = fetch_balance(TICKER, tp=TIME_PERIOD)
+    STATEMENTS = fetch_statements(TICKER)
+
+    bs = STATEMENTS[TIME_PERIOD]["balance"]
     bs = bs.loc[:, bs.isna().mean() < 0.5]
 
-    a_bs = fetch_balance(TICKER, tp='Annual')
+    a_bs = STATEMENTS["Annual"]["balance"]
     a_bs = a_bs.loc[:, a_bs.isna().mean() < 0.5]
 
     fig = plot_balance(bs[bs.columns[::-1]], ticker=TICKER, currency=CURRENCY)
@@ -123,10 +133,10 @@ if len(TICKERS) == 1:
 
     st.header("Income Statement")
 
-    ist = fetch_income(TICKER, tp=TIME_PERIOD)
+    ist = STATEMENTS[TIME_PERIOD]["income"]
     ist = ist.loc[:, ist.isna().mean() < 0.5]
 
-    a_ist = fetch_income(TICKER, tp='Annual')
+    a_ist = STATEMENTS["Annual"]["income"]
     a_ist = a_ist.loc[:, a_ist.isna().mean() < 0.5]
 
     fig = plot_income(ist, ticker=TICKER, currency=CURRENCY)
@@ -183,10 +193,10 @@ if len(TICKERS) == 1:
 
     st.header("Cash Flow")
 
-    cf = fetch_cash(TICKER, tp=TIME_PERIOD)
+    cf = STATEMENTS[TIME_PERIOD]["cash"]
     cf = cf.loc[:, cf.isna().mean() < 0.5]
 
-    a_cf = fetch_cash(TICKER, tp='Annual')
+    a_cf = STATEMENTS["Annual"]["cash"]
     a_cf = a_cf.loc[:, a_cf.isna().mean() < 0.5]
 
     fig = plot_cash(cf, ticker=TICKER, currency=CURRENCY)
@@ -89,21 +89,21 @@ with st.sidebar:
         placeholder="Select interval...",
     )
 
-    indicator_list = ['SMA_20', 'SMA_50', 'SMA_200', 'SMA_X', 'EMA_20', 'EMA_50', 'EMA_200', 'EMA_X', 'ATR', 'MACD', 'RSI']
+    indicator_list = INDICATOR_OPTIONS
 
     INDICATORS = st.multiselect(
         label="Technical indicators:",
         options=indicator_list
     )
 
-    if 'SMA_X' in INDICATORS or 'EMA_X' in INDICATORS:
+    if any(indicator.endswith('_X') for indicator in INDICATORS):
         TIME_SPAN = st.slider(
             label="Select time span:",
             min_value=10,  # The minimum permitted value.
             max_value=200,  # The maximum permitted value.
             value=30  # The value of the slider when it first renders.
         )
-        INDICATORS = [indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS]
+        INDICATORS = [indicator[:-1] + str(TIME_SPAN) if indicator.endswith('_X') else indicator for indicator in INDICATORS]
 
     st.sidebar.markdown("Made with ❤️ by Leonardo")
 
@@ -119,58 +119,24 @@ st.title("Forex Market")
 
 #----FIRST SECTION----
 
+URL_CURRENCIES = "https://finance.yahoo.com/markets/currencies/"
+URL_CRYPTOS = "https://finance.yahoo.com/markets/crypto/all/"
+
+TABLES = fetch_tables([URL_CURRENCIES, URL_CRYPTOS])
+
 col1, col2 = st.columns(2, gap="small")
 
 with col1:
     st.subheader("Top Currencies")
 
-    URL = "https://finance.yahoo.com/markets/currencies/"
-
-    df = fetch_table(URL)
-
     CURRENCIES = ["EURUSD=X", "JPY=X", "GBPUSD=X", "AUDUSD=X", "CNY=X", "MXN=X", "INR=X", "SGD=X", "ZAR=X"]
 
-    with st.container(border=True):
-        i = 0
-        for _ in range(2):
-            cols = st.columns(3, gap="small")
-            for col in cols:
-                with col:
-                    #row = df.iloc[i]
-                    row = df[df['Symbol'] == CURRENCIES[i]].iloc[0]
-                    name = row['Name']
-                    symbol = row['Symbol']
-                    price, change, change_pt = row['Price'].split()
-                    st.metric(
-                        label=f'{name}',
-                        value=f'{price}',
-                        delta=f'{change} {change_pt}'
-                    )
-                i += 1
+    show_quote_board(TABLES[URL_CURRENCIES], rows=2, cols=3, symbols=CURRENCIES, with_symbol=False)
 
 with col2:
     st.subheader("Top Cryptos")
 
-    URL = "https://finance.yahoo.com/markets/crypto/all/"
-
-    df = fetch_table(URL)
-
-    with st.container(border=True):
-        i = 0
-        for _ in range(2):
-            cols = st.columns(3, gap="small")
-            for col in cols:
-                with col:
-                    row = df.iloc[i]
-                    name = row['Name']
-                    symbol = row['Symbol']
-                    price, change, change_pt = row['Price'].split()
-                    st.metric(
-                        label=f'{name}',
-                        value=f'{price}',
-                        delta=f'{change} {change_pt}'
-                    )
-                i += 1
+    show_quote_board(TABLES[URL_CRYPTOS], rows=2, cols=3, with_symbol=False)
 
 #----SECOND SECTION----
 
@@ -207,51 +173,10 @@ col3.metric(
 )
 
 hist = fetch_history(TICKER, period=PERIOD, interval=INTERVAL)
-df = hist.copy()
+df = hist
 df = df.drop(columns=['Volume'], axis=1)
 
-for INDICATOR in INDICATORS:
-    if "SMA" in INDICATOR:
-        window = int(INDICATOR.split("_")[1])
-        df[INDICATOR] = df['Close'].rolling(window=window, min_periods=1).mean()
-    if "EMA" in INDICATOR:
-        window = int(INDICATOR.split("_")[1])
-        df[INDICATOR] = df['Close'].ewm(span=window, adjust=False, min_periods=1).mean()
-
-if "ATR" in INDICATORS:
-
-    Prev_Close = df['Close'].shift(1)
-    High_Low = df['High'] - df['Low']
-    High_PrevClose = abs(df['High'] - Prev_Close)
-    Low_PrevClose = abs(df['Low'] - Prev_Close)
-
-    df['TR'] = pd.concat([High_Low, High_PrevClose, Low_PrevClose], axis=1).max(axis=1)
-
-    df['ATR'] = df['TR'].rolling(window=14, min_periods=1).mean()
-
-    df = df.drop(columns=['TR'], axis=1)
-
-if "MACD" in INDICATORS:
-
-    ema_short = df['Close'].ewm(span=12, adjust=False, min_periods=1).mean()
-    ema_long = df['Close'].ewm(span=26, adjust=False, min_periods=1).mean()
-    df['MACD'] = ema_short - ema_long
-    df['Signal'] = df['MACD'].ewm(span=9, adjust=False, min_periods=1).mean()
-    df['MACD_Hist'] = df['MACD'] - df['Signal']
-
-if "RSI" in INDICATORS:
-
-    # delta = df['Close'].diff()
-    delta = df['Close'].pct_change(periods=1) * 100
-
-    # Separate gains and losses
-    gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
-
-    # Calculate the relative strength (RS)
-    rs = gain / loss
-
-    df['RSI'] = 100 - (100 / (1 + rs))
+df = with_indicators(df, TICKER, PERIOD, INTERVAL, INDICATORS)
 
 fig = plot_candles_stick_bar(df, "Candlestick Chart")
 
@@ -259,6 +184,6 @@ st.plotly_chart(fig, use_container_width=True)
 
 with st.expander("Show data"):
     st.dataframe(
-        data=df.reset_index(),
+        data=dense_bars(df).reset_index(),
         hide_index=True
     )
\ No newline at end of file
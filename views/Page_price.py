@@ -80,7 +80,15 @@ with st.sidebar:
         placeholder="Select interval...",
     )
 
-    TICKERS = [TICKER for TICKER in TICKERS if fetch_info(TICKER) is not None]
+    ENTERED = TICKERS
+
+    TICKERS = validate_tickers(TICKERS)
+
+    for TICKER in ENTERED:
+        if TICKER not in TICKERS:
+            SUGGESTIONS = suggest_tickers(TICKER)
+            if SUGGESTIONS:
+                st.caption(f"{TICKER} not found. Did you mean {', '.join(SUGGESTIONS)}?")
 
     if len(TICKERS) == 1:
 
@@ -89,26 +97,25 @@ with st.sidebar:
             value=True
         )
 
-        indicator_list = ['SMA_20', 'SMA_50', 'SMA_200', 'SMA_X', 'EMA_20', 'EMA_50', 'EMA_200', 'EMA_X', 'ATR', 'MACD', 'RSI']
+    indicator_list = INDICATOR_OPTIONS
 
-        INDICATORS = st.multiselect(
-            label="Technical indicators:",
-            options=indicator_list
-        )
+    INDICATORS = st.multiselect(
+        label="Technical indicators:",
+        options=indicator_list
+    )
 
-        if 'SMA_X' in INDICATORS or 'EMA_X' in INDICATORS:
-            TIME_SPAN = st.slider(
-                label="Select time span:",
-                min_value=10,  # The minimum permitted value.
-                max_value=200,  # The maximum permitted value.
-                value=30  # The value of the slider when it first renders.
-            )
-            INDICATORS = [indicator.replace("X", str(TIME_SPAN)) if '_X' in indicator else indicator for indicator in INDICATORS]
+    if any(indicator.endswith('_X') for indicator in INDICATORS):
+        TIME_SPAN = st.slider(
+            label="Select time span:",
+            min_value=10,  # The minimum permitted value.
+            max_value=200,  # The maximum permitted value.
+            value=30  # The value of the slider when it first renders.
+        )
+        INDICATORS = [indicator[:-1] + str(TIME_SPAN) if indicator.endswith('_X') else indicator for indicator in INDICATORS]
 
-    button = st.button("Refresh All", key="refresh_security")
+    button = st.button("Refresh", key="refresh_security")
     if button:
-        #fetch_info.clear()
-        st.cache_data.clear()
+        refresh_tickers(ENTERED)
 
     st.markdown("Made with ❤️ by Leonardo")
 
@@ -123,81 +130,30 @@ st.title("Stock Market")
 
 #----FIRST SECTION----
 
+URL_INDICES = "https://finance.yahoo.com/markets/world-indices/"
+URL_GAINERS = "https://finance.yahoo.com/markets/stocks/gainers/"
+URL_LOSERS = "https://finance.yahoo.com/markets/stocks/losers/"
+
+TABLES = fetch_tables([URL_INDICES, URL_GAINERS, URL_LOSERS])
+
 col1, col2, col3 = st.columns(3, gap="small")
 
 with col1:
     st.subheader("Indices")
 
-    URL = "https://finance.yahoo.com/markets/world-indices/"
-
-    df = fetch_table(URL)
-
     INDICES = ["^GSPC", "^DJI", "^IXIC", "^N225", "^GDAXI", "^MERV"]
 
-    with st.container(border=True):
-        i = 0
-        for _ in range(3):
-            cols = st.columns(2, gap="small")
-            for col in cols:
-                with col:
-                    row = df[df['Symbol'] == INDICES[i]].iloc[0]
-                    name = row['Name']
-                    symbol = row['Symbol']
-                    price, change, change_pt = row['Price'].split()
-                    st.metric(
-                        label=f'{name} ({symbol})',
-                        value=f'{price}',
-                        delta=f'{change} {change_pt}'
-                    )
-                i += 1
+    show_quote_board(TABLES[URL_INDICES], rows=3, cols=2, symbols=INDICES)
 
 with col2:
     st.subheader("Top Gainers")
 
-    URL = "https://finance.yahoo.com/markets/stocks/gainers/"
-
-    df = fetch_table(URL)
-
-    with st.container(border=True):
-        i = 0
-        for _ in range(3):
-            cols = st.columns(2, gap="small")
-            for col in cols:
-                with col:
-                    row = df.iloc[i]
-                    name = row['Name']
-                    symbol = row['Symbol']
-                    price, change, change_pt = row['Price'].split()
-                    st.metric(
-                        label=f'{name} ({symbol})',
-                        value=f'{price}',
-                        delta=f'{change} {change_pt}'
-                    )
-                i += 1
+    show_quote_board(TABLES[URL_GAINERS], rows=3, cols=2)
 
 with col3:
     st.subheader("Top Losers")
 
-    URL = "https://finance.yahoo.com/markets/stocks/losers/"
-
-    df = fetch_table(URL)
-
-    with st.container(border=True):
-        i = 0
-        for _ in range(3):
-            cols = st.columns(2, gap="small")
-            for col in cols:
-                with col:
-                    row = df.iloc[i]
-                    name = row['Name']
-                    symbol = row['Symbol']
-                    price, change, change_pt = row['Price'].split()
-                    st.metric(
-                        label=f'{name} ({symbol})',
-                        value=f'{price}',
-                        delta=f'{change} {change_pt}'
-                    )
-                i += 1
+    show_quote_board(TABLES[URL_LOSERS], rows=3, cols=2)
 
 
 #----SECOND SECTION----
@@ -262,7 +218,7 @@ if len(TICKERS) == 1:
     #----CANDLESTICK CHART----
     hist = fetch_history(TICKER, period=PERIOD, interval=INTERVAL)
 
-    df = hist.copy()
+    df = hist
 
     # Price Performance
 
@@ -293,48 +249,7 @@ if len(TICKERS) == 1:
     if not TOGGLE_VOL:
         df = df.drop(columns=['Volume'], axis=1)
 
-    for INDICATOR in INDICATORS:
-        if "SMA" in INDICATOR:
-            window = int(INDICATOR.split("_")[1])
-            df[INDICATOR] = df['Close'].rolling(window=window, min_periods=1).mean()
-        if "EMA" in INDICATOR:
-            window = int(INDICATOR.split("_")[1])
-            df[INDICATOR] = df['Close'].ewm(span=window, adjust=False, min_periods=1).mean()
-
-    if "ATR" in INDICATORS:
-
-        Prev_Close = df['Close'].shift(1)
-        High_Low = df['High'] - df['Low']
-        High_PrevClose = abs(df['High'] - Prev_Close)
-        Low_PrevClose = abs(df['Low'] - Prev_Close)
-
-        df['TR'] = pd.concat([High_Low, High_PrevClose, Low_PrevClose], axis=1).max(axis=1)
-
-        df['ATR'] = df['TR'].rolling(window=14, min_periods=1).mean()
-
-        df = df.drop(columns=['TR'], axis=1)
-
-    if "MACD" in INDICATORS:
-
-        ema_short = df['Close'].ewm(span=12, adjust=False, min_periods=1).mean()
-        ema_long = df['Close'].ewm(span=26, adjust=False, min_periods=1).mean()
-        df['MACD'] = ema_short - ema_long
-        df['Signal'] = df['MACD'].ewm(span=9, adjust=False, min_periods=1).mean()
-        df['MACD_Hist'] = df['MACD'] - df['Signal']
-
-    if "RSI" in INDICATORS:
-
-        # delta = df['Close'].diff()
-        delta = df['Close'].pct_change(periods=1) * 100
-
-        # Separate gains and losses
-        gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
-
-        # Calculate the relative strength (RS)
-        rs = gain / loss
-
-        df['RSI'] = 100 - (100 / (1 + rs))
+    df = with_indicators(df, TICKER, PERIOD, INTERVAL, INDICATORS)
 
     fig = plot_candles_stick_bar(df, "Candlestick Chart")
 
@@ -344,7 +259,7 @@ if len(TICKERS) == 1:
 
         st.markdown("Daily prices")
         st.dataframe(
-            data=df.reset_index(),
+            data=dense_bars(df).reset_index(),
             hide_index=False
         )
 
@@ -357,13 +272,17 @@ else:
     dfs_hist = list()
     dfs_info = list()
 
+    hists = fetch_history_batch(TICKERS, period=PERIOD, interval=INTERVAL)
+
+    hists = with_panel_indicators(hists, PERIOD, INTERVAL, INDICATORS)
+
     for TICKER in TICKERS:
         info = fetch_info(TICKER)
         df, PRICE = info_table(info)
         df = df.rename(columns={0: TICKER})
         dfs_info.append(df)
 
-        hist = fetch_history(TICKER, period=PERIOD, interval=INTERVAL)
+        hist = hists[TICKER]
 
         hist.insert(0, 'Ticker', TICKER)
 
@@ -401,6 +320,6 @@ else:
 
         st.markdown("Daily prices")
         st.dataframe(
-            data=df.reset_index(),
+            data=dense_bars(df).reset_index(),
             hide_index=False
         )
\ No newline at end of file